@@ -0,0 +1,383 @@
+from Grid.GridMap import *
+from Algorithms.PathFindingAlgorithm import PathFindingAlgorithm, SearchResult
+from Algorithms.SolveTrace import SolveTrace
+
+from heapq import heappop, heappush
+from typing import *
+import weakref
+
+
+class ClusterGraph():
+    # Entrances narrower than this get a single transition in the middle, wider ones one at each end.
+    wideEntrance: int = 6
+
+    _directions: Tuple[Tuple[int, int], ...] = ((1, 0), (-1, 0), (0, -1), (0, 1))
+
+
+    def __init__(self, gridMatrix: GridMatrix, clusterSize: int = 16):
+        self._grid = weakref.ref(gridMatrix)
+        self.clusterSize = clusterSize
+        self._reset(gridMatrix)
+        gridMatrix.addChangeCallback(self._onCellChanged)
+
+
+    def _reset(self, gridMatrix: GridMatrix) -> None:
+        self.rows = gridMatrix.rows
+        self.columns = gridMatrix.columns
+        self.clusterRows = -(-self.rows // self.clusterSize)
+        self.clusterColumns = -(-self.columns // self.clusterSize)
+
+        # Transitions `(a, b)` across the border between two clusters, `a` in the first one.
+        self._borders: Dict[Tuple[Tuple[int, int], Tuple[int, int]], List[Tuple[int, int]]] = {}
+        # Cells on the other side of the transitions leaving an entrance cell.
+        self._partners: Dict[int, List[int]] = {}
+        # Distances inside a cluster between all of its entrance cells.
+        self._distances: Dict[Tuple[int, int], Dict[int, Dict[int, int]]] = {}
+        self._dirty: Set[Tuple[int, int]] = {
+            (i, j) for i in range(self.clusterRows) for j in range(self.clusterColumns)}
+
+
+    def _onCellChanged(self, cell: Optional[Tuple[int, int]]) -> None:
+        gridMatrix = self._grid()
+        if gridMatrix is None:
+            return
+
+        if cell is None:
+            self._reset(gridMatrix)
+            return
+
+        # A border cell also changes the entrances seen from the neighboring cluster.
+        (x, y) = cell
+        size = self.clusterSize
+        for dx, dy in ((0, 0),) + ClusterGraph._directions:
+            if 0 <= x + dx < self.rows and 0 <= y + dy < self.columns:
+                self._dirty.add(((x + dx) // size, (y + dy) // size))
+
+
+    def clusterOf(self, index: int) -> Tuple[int, int]:
+        x, y = divmod(index, self.columns)
+        return (x // self.clusterSize, y // self.clusterSize)
+
+
+    def _bounds(self, cluster: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        top, left = cluster[0] * self.clusterSize, cluster[1] * self.clusterSize
+        return (top, left, min(top + self.clusterSize, self.rows), min(left + self.clusterSize, self.columns))
+
+
+    def _buildBorder(self, cells: memoryview, first: Tuple[int, int], second: Tuple[int, int]) -> None:
+        # `second` is the cluster below or to the right of `first`.
+        for a, b in self._borders.pop((first, second), []):
+            self._partners[a].remove(b)
+            self._partners[b].remove(a)
+
+        top, left, bottom, right = self._bounds(first)
+        if second[0] > first[0]:
+            pairs = [((bottom - 1) * self.columns + y, bottom * self.columns + y) for y in range(left, right)]
+        else:
+            pairs = [(x * self.columns + right - 1, x * self.columns + right) for x in range(top, bottom)]
+
+        transitions = []
+        run: List[Tuple[int, int]] = []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and not cells[a] and not cells[b]:
+                run.append((a, b))
+                continue
+
+            if len(run) >= ClusterGraph.wideEntrance:
+                transitions += [run[0], run[-1]]
+            elif run:
+                transitions.append(run[len(run) // 2])
+            run = []
+
+        self._borders[(first, second)] = transitions
+        for a, b in transitions:
+            self._partners.setdefault(a, []).append(b)
+            self._partners.setdefault(b, []).append(a)
+
+
+    def _entrances(self, cluster: Tuple[int, int]) -> Set[int]:
+        (i, j) = cluster
+        result = set()
+        for first, second, side in (((i - 1, j), cluster, 1), (cluster, (i + 1, j), 0),
+                                    ((i, j - 1), cluster, 1), (cluster, (i, j + 1), 0)):
+            for transition in self._borders.get((first, second), []):
+                result.add(transition[side])
+        return result
+
+
+    def _localGraph(self, cluster: Tuple[int, int]) -> Tuple[int, int, int, List[Tuple[int, ...]]]:
+        # Adjacency of the cluster's cells in local `row * width + column` indices, edges leaving the
+        # cluster removed. Searches inside one cluster then avoid any bounds checks or dictionaries.
+        top, left, bottom, right = self._bounds(cluster)
+        height, width = bottom - top, right - left
+        offsets = (width, -width, -1, 1)
+        table = [tuple(offsets[i] for i in range(4) if mask >> i & 1) for mask in range(16)]
+        openDirections = self._grid().openDirections
+
+        adjacency = []
+        for x in range(height):
+            allowed = 15 & ~(1 if x == height - 1 else 0) & ~(2 if x == 0 else 0)
+            rowStart = (top + x) * self.columns + left
+            masks = [mask & allowed for mask in openDirections[rowStart:rowStart + width]]
+            masks[0] &= ~4
+            masks[-1] &= ~8
+            adjacency += [table[mask] for mask in masks]
+
+        return (top, left, width, adjacency)
+
+
+    def _clusterSearch(self, graph: Tuple[int, int, int, List[Tuple[int, ...]]], start: int,
+                       goals: Set[int]) -> Tuple[Dict[int, int], List[int], int]:
+        # Breadth-first search inside one cluster from `start` until every goal is reached. Returns
+        # the distances of the reached goals, the local parents and the number of visited cells.
+        top, left, width, adjacency = graph
+        local = lambda index: (index // self.columns - top) * width + index % self.columns - left
+
+        localGoals = {local(goal): goal for goal in goals if goal != start}
+        parents = [-1] * len(adjacency)
+        first = local(start)
+        parents[first] = first
+
+        distances = {start: 0} if start in goals else {}
+        remaining = len(localGoals)
+        frontier = [first]
+        depth = 0
+        visited = 1
+
+        while frontier and remaining:
+            depth += 1
+            layer = []
+            for current in frontier:
+                for offset in adjacency[current]:
+                    next = current + offset
+                    if parents[next] < 0:
+                        parents[next] = current
+                        layer.append(next)
+                        if next in localGoals:
+                            distances[localGoals[next]] = depth
+                            remaining -= 1
+            visited += len(layer)
+            frontier = layer
+
+        return (distances, parents, visited)
+
+
+    def _linkCluster(self, cluster: Tuple[int, int], nodes: Set[int]) -> Dict[int, Dict[int, int]]:
+        graph = self._localGraph(cluster)
+        result = {node: {} for node in nodes}
+        remaining = set(nodes)
+        for node in nodes:
+            # Distances are symmetric between free cells, each pair is searched only once.
+            remaining.discard(node)
+            distances, _, _ = self._clusterSearch(graph, node, remaining)
+            for other, distance in distances.items():
+                result[node][other] = distance
+                result[other][node] = distance
+        return result
+
+
+    def update(self) -> None:
+        # Rebuilds the entrances and distances of the clusters touched since the last query.
+        gridMatrix = self._grid()
+        if not self._dirty or gridMatrix is None:
+            return
+
+        cells = gridMatrix.buffer
+        dirty = self._dirty
+        self._dirty = set()
+
+        for (i, j) in dirty:
+            for first, second in (((i - 1, j), (i, j)), ((i, j), (i + 1, j)), ((i, j - 1), (i, j)), ((i, j), (i, j + 1))):
+                if 0 <= first[0] and 0 <= first[1] and second[0] < self.clusterRows and second[1] < self.clusterColumns:
+                    self._buildBorder(cells, first, second)
+
+        # Rebuilt borders of clean neighbors come out unchanged, so only dirty clusters need new distances.
+        for cluster in dirty:
+            self._distances[cluster] = self._linkCluster(cluster, self._entrances(cluster))
+
+
+    def _edges(self, node: int, extra: Dict[int, Dict[int, int]]) -> Iterator[Tuple[int, int]]:
+        yield from self._distances[self.clusterOf(node)].get(node, {}).items()
+        for partner in self._partners.get(node, []):
+            yield (partner, 1)
+        yield from extra.get(node, {}).items()
+
+
+    def _insert(self, node: int, extra: Dict[int, Dict[int, int]], target: Optional[int] = None) -> int:
+        # Temporarily connects a query endpoint to the entrances of its cluster, and directly to
+        # `target` when it lies in the same cluster.
+        cluster = self.clusterOf(node)
+        goals = self._entrances(cluster)
+        if target is not None and self.clusterOf(target) == cluster:
+            goals.add(target)
+
+        distances, _, visited = self._clusterSearch(self._localGraph(cluster), node, goals)
+        for goal, distance in distances.items():
+            if goal != node:
+                extra.setdefault(node, {})[goal] = distance
+                extra.setdefault(goal, {})[node] = distance
+        return visited
+
+
+    def _refine(self, abstractPath: List[int]) -> List[int]:
+        path = [abstractPath[0]]
+        for current, next in zip(abstractPath, abstractPath[1:]):
+            (x, y), (nextX, nextY) = divmod(current, self.columns), divmod(next, self.columns)
+            if abs(x - nextX) + abs(y - nextY) == 1:
+                path.append(next)
+                continue
+
+            top, left, width, adjacency = graph = self._localGraph(self.clusterOf(current))
+            _, parents, _ = self._clusterSearch(graph, current, {next})
+            local = (nextX - top) * width + nextY - left
+            segment = []
+            while parents[local] != local:
+                segment.append((top + local // width) * self.columns + left + local % width)
+                local = parents[local]
+            path += reversed(segment)
+
+        return path
+
+
+    def _smooth(self, path: List[int]) -> Tuple[List[int], int]:
+        # The refined path only crosses clusters at their transitions, which can make it much longer than
+        # the shortest one. A breadth-first search restricted to the clusters it passes through finds the
+        # shortest path within them, never longer since the refined path itself lies there.
+        # Returns that path and the number of cells expanded.
+        gridMatrix = self._grid()
+        columns = self.columns
+        size = self.clusterSize
+        openDirections = gridMatrix.openDirections
+        moves = gridMatrix.neighborIndexOffsets()
+        corridor = {self.clusterOf(i) for i in path}
+
+        source, target = path[0], path[-1]
+        parents = {source: source}
+        frontier = [source]
+        expanded = 0
+
+        while frontier and target not in parents:
+            expanded += len(frontier)
+            layer = []
+            for current in frontier:
+                x, y = divmod(current, columns)
+                for offset, dx, dy in moves[openDirections[current] | ((x + y) & 1) << 4]:
+                    next = current + offset
+                    if next not in parents and ((x + dx) // size, (y + dy) // size) in corridor:
+                        parents[next] = current
+                        layer.append(next)
+            frontier = layer
+
+        if target not in parents:
+            return (path, expanded)
+
+        smoothed = [target]
+        while smoothed[-1] != source:
+            smoothed.append(parents[smoothed[-1]])
+        smoothed.reverse()
+        return (smoothed, expanded)
+
+
+    def search(self, source: int, target: int) -> Tuple[Optional[List[int]], int]:
+        self.update()
+
+        gridMatrix = self._grid()
+        extra: Dict[int, Dict[int, int]] = {}
+        starts = [source]
+        if gridMatrix.buffer[source]:
+            # Entrances only join free cells, but a search may still step out of a walled source,
+            # possibly straight into the next cluster.
+            for (x, y) in gridMatrix.neighbors(divmod(source, self.columns)):
+                next = x * self.columns + y
+                if self.clusterOf(next) != self.clusterOf(source):
+                    extra.setdefault(source, {})[next] = 1
+                    starts.append(next)
+
+        expanded = self._insert(target, extra)
+        for node in starts:
+            expanded += self._insert(node, extra, target)
+
+        targetX, targetY = divmod(target, self.columns)
+        costs = {source: 0}
+        parents = {source: source}
+        closed = set()
+        frontier = [(0, source)]
+
+        while frontier:
+            _, current = heappop(frontier)
+            if current == target:
+                break
+
+            if current in closed:
+                continue
+
+            closed.add(current)
+            expanded += 1
+            for next, cost in self._edges(current, extra):
+                newCost = costs[current] + cost
+                if next not in costs or newCost < costs[next]:
+                    costs[next] = newCost
+                    parents[next] = current
+                    x, y = divmod(next, self.columns)
+                    heappush(frontier, (newCost + abs(x - targetX) + abs(y - targetY), next))
+
+        if target not in parents:
+            return (None, expanded)
+
+        abstractPath = [target]
+        while abstractPath[-1] != source:
+            abstractPath.append(parents[abstractPath[-1]])
+        abstractPath.reverse()
+
+        path, smoothing = self._smooth(self._refine(abstractPath))
+        return (path, expanded + smoothing)
+
+
+
+class HierarchicalPathFindingAlgorithm(PathFindingAlgorithm):
+    # HPA*: queries run on a graph of cluster entrances and only the chosen segments are refined
+    # on the grid, then smoothed within the clusters they cross. Paths are the shortest ones through
+    # those clusters, not always the shortest on the whole grid: approximate, unlike the other searches.
+
+    clusterSize: int = 16
+
+    _graphs: "weakref.WeakKeyDictionary[GridMatrix, ClusterGraph]" = weakref.WeakKeyDictionary()
+
+
+    @staticmethod
+    def clusterGraph(gridMatrix: GridMatrix) -> ClusterGraph:
+        # One graph per grid, kept up to date through the grid's change callbacks.
+        graph = HierarchicalPathFindingAlgorithm._graphs.get(gridMatrix)
+        if graph is None:
+            graph = ClusterGraph(gridMatrix, HierarchicalPathFindingAlgorithm.clusterSize)
+            HierarchicalPathFindingAlgorithm._graphs[gridMatrix] = graph
+        return graph
+
+
+    @staticmethod
+    def search(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> SearchResult:
+        if not (gridMatrix.inBounds(source) and gridMatrix.inBounds(target)):
+            return SearchResult(None, 0)
+
+        if gridMatrix.getCell(target) and source != target:
+            return SearchResult(None, 0)
+
+        graph = HierarchicalPathFindingAlgorithm.clusterGraph(gridMatrix)
+        path, expanded = graph.search(gridMatrix.index(source), gridMatrix.index(target))
+        if path is None:
+            return SearchResult(None, expanded)
+
+        return SearchResult([divmod(i, gridMatrix.columns) for i in path], expanded)
+
+
+    @staticmethod
+    def _solveSteps(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int],
+                    trace: SolveTrace) -> Iterator[None]:
+        # Animates the refined path only: the abstract search has no meaningful cell-by-cell order.
+        path = HierarchicalPathFindingAlgorithm.solve(gridMatrix, source, target)
+        if path is not None:
+            trace.root(source)
+            for previous, cell in zip(path, path[1:]):
+                trace.expand(previous)
+                trace.check(cell, previous)
+                yield
@@ -0,0 +1,187 @@
+from Grid.GridMap import *
+from Algorithms.PathFindingAlgorithm import SearchResult
+from Algorithms.SearchKernel import SearchKernel
+
+from array import array
+from heapq import heappop, heappush
+from typing import *
+import weakref
+
+
+class LifelongPlanningAStar():
+    # Lifelong Planning A* (Koenig, Likhachev, Furcy) on flat cell indices. The search from
+    # `source` to `target` is kept between calls: after walls change only the cells whose
+    # distance is affected are expanded again. Costs are those of `SearchKernel`.
+    infinity: int = 1 << 62
+
+    _directions: Tuple[Tuple[int, int], ...] = ((1, 0), (-1, 0), (0, -1), (0, 1))
+
+
+    def __init__(self, gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]):
+        self._grid = weakref.ref(gridMatrix)
+        self.source = source
+        self.target = target
+        self.expanded = 0
+        self._g: Optional[array] = None
+        self._pending: Set[int] = set()
+        gridMatrix.addChangeCallback(self._onCellChanged)
+
+
+    @property
+    def gridMatrix(self) -> Optional[GridMatrix]:
+        return self._grid()
+
+
+    def detach(self) -> None:
+        gridMatrix = self._grid()
+        if gridMatrix is not None:
+            gridMatrix.removeChangeCallback(self._onCellChanged)
+        self._g = None
+
+
+    def setEndpoints(self, source: Tuple[int, int], target: Tuple[int, int]) -> None:
+        # The kept search is rooted at `source` and ordered towards `target`, so it cannot be reused.
+        if (source, target) != (self.source, self.target):
+            self.source = source
+            self.target = target
+            self._g = None
+
+
+    def _onCellChanged(self, cell: Optional[Tuple[int, int]]) -> None:
+        if self._g is None:
+            return
+
+        if cell is None:
+            self._g = None
+        else:
+            self._pending.add(cell[0] * self.columns + cell[1])
+
+
+    def _initialize(self, gridMatrix: GridMatrix) -> None:
+        self.rows = gridMatrix.rows
+        self.columns = gridMatrix.columns
+        size = self.rows * self.columns
+        scale = SearchKernel.costScale
+
+        self._start = gridMatrix.index(self.source)
+        self._goal = gridMatrix.index(self.target)
+        self._goalX, self._goalY = self.target
+        self._g = array('q', [LifelongPlanningAStar.infinity]) * size
+        self._rhs = array('q', [LifelongPlanningAStar.infinity]) * size
+        self._rhs[self._start] = 0
+        self._frontier = [self._key(self._start) + (self._start,)]
+        self._pending = set()
+
+        # Successors of a cell come from its open-direction mask, like in `SearchKernel`.
+        self._moves = SearchKernel._moves(gridMatrix)
+        # `_predecessors[parity][i]` is the offset and the cost of the step into a cell of the given
+        # parity from its neighbor in direction `i`; that neighbor has the other parity.
+        self._predecessors = tuple(
+            tuple((dx * self.columns + dy, scale + ((dx != 0) == (parity == 1))) for dx, dy in LifelongPlanningAStar._directions)
+            for parity in range(2))
+
+
+    def _key(self, index: int) -> Tuple[int, int]:
+        best = min(self._g[index], self._rhs[index])
+        x, y = divmod(index, self.columns)
+        return (best + SearchKernel.costScale * (abs(x - self._goalX) + abs(y - self._goalY)), best)
+
+
+    def _bestPredecessor(self, index: int) -> Tuple[int, int]:
+        # The cheapest way into `index` through one of its neighbors, as `(cost, neighbor)`.
+        # The source is the only wall a path may leave, every other wall keeps an infinite distance.
+        g = self._g
+        x, y = divmod(index, self.columns)
+        inBounds = (x + 1 < self.rows, x > 0, y > 0, y + 1 < self.columns)
+        best = (LifelongPlanningAStar.infinity, -1)
+        for (offset, cost), valid in zip(self._predecessors[(x + y) & 1], inBounds):
+            if valid:
+                neighbor = index + offset
+                if g[neighbor] + cost < best[0]:
+                    best = (g[neighbor] + cost, neighbor)
+        return best
+
+
+    def _updateCell(self, cells: memoryview, index: int) -> None:
+        if index != self._start:
+            self._rhs[index] = LifelongPlanningAStar.infinity if cells[index] else self._bestPredecessor(index)[0]
+
+        if self._g[index] != self._rhs[index]:
+            heappush(self._frontier, self._key(index) + (index,))
+
+
+    def _computeShortestPath(self, gridMatrix: GridMatrix) -> int:
+        cells = gridMatrix.buffer
+        openDirections = gridMatrix.openDirections
+        g, rhs, frontier, moves = self._g, self._rhs, self._frontier, self._moves
+        goal = self._goal
+        columns = self.columns
+        infinity = LifelongPlanningAStar.infinity
+        expanded = 0
+
+        while frontier:
+            # Entries are never removed from the heap, outdated ones are skipped when they surface.
+            top = frontier[0]
+            current = top[2]
+            if g[current] == rhs[current] or top[:2] != self._key(current):
+                heappop(frontier)
+                continue
+
+            if top[:2] >= self._key(goal) and g[goal] == rhs[goal]:
+                break
+
+            heappop(frontier)
+            expanded += 1
+            x, y = divmod(current, columns)
+            successors = moves[openDirections[current] | ((x + y) & 1) << 4]
+
+            if g[current] > rhs[current]:
+                g[current] = rhs[current]
+                for offset, _, _, cost in successors:
+                    next = current + offset
+                    if g[current] + cost < rhs[next] and next != self._start:
+                        rhs[next] = g[current] + cost
+                        heappush(frontier, self._key(next) + (next,))
+            else:
+                g[current] = infinity
+                self._updateCell(cells, current)
+                for offset, _, _, _ in successors:
+                    self._updateCell(cells, current + offset)
+
+        return expanded
+
+
+    def search(self) -> SearchResult:
+        gridMatrix = self._grid()
+        if gridMatrix is None or not (gridMatrix.inBounds(self.source) and gridMatrix.inBounds(self.target)):
+            return SearchResult(None, 0)
+
+        if self._g is None:
+            self._initialize(gridMatrix)
+        else:
+            cells = gridMatrix.buffer
+            for index in self._pending:
+                self._updateCell(cells, index)
+            self._pending.clear()
+
+        self.expanded = self._computeShortestPath(gridMatrix)
+        return SearchResult(self._tracePath(), self.expanded)
+
+
+    def solve(self) -> List[Tuple[int, int]]:
+        return self.search().path
+
+
+    def _tracePath(self) -> Optional[List[Tuple[int, int]]]:
+        if self._g[self._goal] >= LifelongPlanningAStar.infinity:
+            return None
+
+        # Walking back along the cheapest predecessors follows a shortest path once the goal is consistent.
+        current = self._goal
+        path = [self.target]
+        while current != self._start:
+            current = self._bestPredecessor(current)[1]
+            path.append(divmod(current, self.columns))
+
+        path.reverse()
+        return path
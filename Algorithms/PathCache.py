@@ -0,0 +1,176 @@
+from Grid.GridMap import GridMatrix
+from Algorithms.PathFindingAlgorithm import PathFindingAlgorithm, SearchResult
+from collections import OrderedDict
+from typing import *
+import sys
+import weakref
+
+# Maps the top byte of a flat-index parent to 0 for "unreached" (-1) and to 1 otherwise.
+# Valid indices are below 2 ** 31, so only -1 has an all-ones top byte.
+_REACHED = bytes(0 if i == 0xff else 1 for i in range(256))
+_TOP_BYTE = 3 if sys.byteorder == 'little' else 0
+
+
+class _CacheEntry():
+    def __init__(self, result: SearchResult, region: Optional[bytes], blockColumns: int, size: int):
+        self.result = result
+        # One byte per `blockSize` square of the grid, set where the search reached a cell.
+        # None means the region is unknown, so any edit invalidates the entry.
+        self.region = region
+        self.blockColumns = blockColumns
+        self.size = size
+
+
+class _GridState():
+    def __init__(self):
+        self.version = -1
+        self.fingerprint: Optional[bytes] = None
+        # Entries still valid for the grid's current contents after edits made since
+        # `fingerprint` was taken, moved to the new fingerprint on the next lookup.
+        self.carried: Optional[List[Tuple[Tuple[Type[PathFindingAlgorithm], Tuple[int, int], Tuple[int, int]], _CacheEntry]]] = None
+
+
+class PathCache():
+
+    def __init__(self, maxBytes: int = 64 << 20, blockSize: int = 16):
+        self.maxBytes = maxBytes
+        self.blockSize = blockSize
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[bytes, Type[PathFindingAlgorithm], Tuple[int, int], Tuple[int, int]], _CacheEntry]" = OrderedDict()
+        self._byFingerprint: Dict[bytes, Set[Tuple[bytes, Type[PathFindingAlgorithm], Tuple[int, int], Tuple[int, int]]]] = {}
+        self._grids: "weakref.WeakKeyDictionary[GridMatrix, _GridState]" = weakref.WeakKeyDictionary()
+
+
+    def solve(self, algorithm: Union[PathFindingAlgorithm, Type[PathFindingAlgorithm]], gridMatrix: GridMatrix,
+              source: Tuple[int, int], target: Tuple[int, int]) -> List[Tuple[int, int]]:
+        return self.search(algorithm, gridMatrix, source, target).path
+
+
+    def search(self, algorithm: Union[PathFindingAlgorithm, Type[PathFindingAlgorithm]], gridMatrix: GridMatrix,
+               source: Tuple[int, int], target: Tuple[int, int]) -> SearchResult:
+        algorithm = algorithm if isinstance(algorithm, type) else type(algorithm)
+        key = (self._fingerprint(gridMatrix), algorithm, tuple(source), tuple(target))
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.result
+
+        self.misses += 1
+        entry = self._createEntry(gridMatrix, algorithm.search(gridMatrix, source, target))
+        self._store(key, entry)
+        return entry.result
+
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._byFingerprint.clear()
+        for state in self._grids.values():
+            state.carried = None
+        self.size = 0
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+    def _fingerprint(self, gridMatrix: GridMatrix) -> bytes:
+        state = self._grids.get(gridMatrix)
+        if state is None:
+            state = _GridState()
+            self._grids[gridMatrix] = state
+            # The grid must not keep a discarded cache alive through its callback.
+            def onCellChanged(cell: Optional[Tuple[int, int]], cache=weakref.ref(self), grid=weakref.ref(gridMatrix)) -> None:
+                if cache() is not None and grid() is not None:
+                    cache()._onCellChanged(grid(), cell)
+
+            gridMatrix.addChangeCallback(onCellChanged)
+
+        if state.version != gridMatrix.version:
+            state.fingerprint = gridMatrix.fingerprint()
+            state.version = gridMatrix.version
+            for (algorithm, source, target), entry in state.carried or []:
+                key = (state.fingerprint, algorithm, source, target)
+                if key not in self._entries:
+                    self._store(key, entry)
+            state.carried = None
+
+        return state.fingerprint
+
+
+    def _onCellChanged(self, gridMatrix: GridMatrix, cell: Optional[Tuple[int, int]]) -> None:
+        state = self._grids.get(gridMatrix)
+        if state is None or state.fingerprint is None:
+            return
+
+        if state.carried is None:
+            state.carried = [(key[1:], self._entries[key]) for key in self._byFingerprint.get(state.fingerprint, ())]
+
+        # Entries stay under the old fingerprint, where they are still right for other grids with
+        # the old contents; only those whose search never reached the edited cell or its neighbors
+        # carry over, since the search would have gone exactly the same way on the new contents.
+        if cell is None:
+            state.carried = []
+        else:
+            state.carried = [i for i in state.carried if not self._crosses(i[1], cell)]
+
+
+    def _crosses(self, entry: _CacheEntry, cell: Tuple[int, int]) -> bool:
+        if entry.region is None:
+            return True
+
+        (x, y) = cell
+        for (i, j) in ((x, y), (x + 1, y), (x - 1, y), (x, y - 1), (x, y + 1)):
+            if i >= 0 and j >= 0:
+                block = (i // self.blockSize) * entry.blockColumns + j // self.blockSize
+                if j // self.blockSize < entry.blockColumns and block < len(entry.region) and entry.region[block]:
+                    return True
+
+        return False
+
+
+    def _createEntry(self, gridMatrix: GridMatrix, result: SearchResult) -> _CacheEntry:
+        blockColumns = -(-gridMatrix.columns // self.blockSize)
+        region = None if result.parents is None else self._reachedBlocks(gridMatrix, result.parents, blockColumns)
+
+        # Rough footprint: a tuple and a list slot per path cell plus the region bitmap.
+        size = 200 + (0 if result.path is None else 72 * len(result.path)) + (0 if region is None else len(region))
+        return _CacheEntry(SearchResult(result.path, result.expanded), region, blockColumns, size)
+
+
+    def _reachedBlocks(self, gridMatrix: GridMatrix, parents: Sequence[int], blockColumns: int) -> bytes:
+        columns = gridMatrix.columns
+        blockSize = self.blockSize
+        reached = bytes(parents)[_TOP_BYTE::4].translate(_REACHED)
+        region = bytearray(-(-gridMatrix.rows // blockSize) * blockColumns)
+
+        for row in range(gridMatrix.rows):
+            cells = reached[row * columns:(row + 1) * columns]
+            if 1 not in cells:
+                continue
+
+            base = (row // blockSize) * blockColumns
+            for block in range(blockColumns):
+                if not region[base + block] and 1 in cells[block * blockSize:(block + 1) * blockSize]:
+                    region[base + block] = 1
+
+        return bytes(region)
+
+
+    def _store(self, key: Tuple[bytes, Type[PathFindingAlgorithm], Tuple[int, int], Tuple[int, int]], entry: _CacheEntry) -> None:
+        if entry.size > self.maxBytes:
+            return
+
+        self._entries[key] = entry
+        self._byFingerprint.setdefault(key[0], set()).add(key)
+        self.size += entry.size
+
+        while self.size > self.maxBytes:
+            oldKey, oldEntry = self._entries.popitem(last=False)
+            self._byFingerprint[oldKey[0]].discard(oldKey)
+            if not self._byFingerprint[oldKey[0]]:
+                del self._byFingerprint[oldKey[0]]
+            self.size -= oldEntry.size
@@ -1,47 +1,54 @@
 from Grid.GridMap import *
+from Algorithms.SearchKernel import SearchKernel
+from Algorithms.SolveTrace import SolveTrace
 from abc import ABC, abstractmethod
 from typing import *
-from queue import PriorityQueue, Queue
 
-class SolveQueue():
 
-    class SolveStep():
-        def __init__(self, used: List[Tuple[int, int]], path: List[int], selected: Tuple[int, int]):
-            self.properties = {
-                'used': used,
-                'cameFrom': path,
-                'selected': selected
-            }
+class SearchResult():
+    def __init__(self, path: Optional[List[Tuple[int, int]]], expanded: int, parents: Optional[Sequence[int]] = None):
+        self.path = path
+        self.expanded = expanded
+        # Flat-index parents of every cell the search reached (-1 elsewhere), set only by
+        # searches whose whole explored region is recorded there.
+        self.parents = parents
 
 
-    def __init__(self):
-        self.__queue = Queue()
-
-
-    def enqueue(self, used: List[Tuple[int, int]], path: List[int], selected: Tuple[int, int]):
-        self.__queue.put(SolveQueue.SolveStep(used, path, selected))
-    
-
-    def dequeue(self) -> Tuple[List[Tuple[int, int]], Tuple[int, int]]:
-        result = self.__queue.get().properties
-        return (result['used'], result['cameFrom'], result['selected'])
-
-
-    def isEmpty(self) -> bool:
-        return self.__queue.empty()
+class PathFindingAlgorithm(ABC):
 
+    @classmethod
+    def solve(cls, gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> List[Tuple[int, int]]:
+        return cls.search(gridMatrix, source, target).path
 
-class PathFindingAlgorithm(ABC):
 
     @staticmethod
     @abstractmethod
-    def solve(self, gridMap: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> List[Tuple[int, int]]:
+    def search(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> SearchResult:
         pass
 
     
+    @classmethod
+    def getSolveQueue(cls, gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int],
+                      lazy: bool = False) -> SolveTrace:
+        # With `lazy` the search only runs as far as the trace is read, so the first steps are
+        # available at once whatever the size of the grid.
+        trace = SolveTrace(gridMatrix.rows, gridMatrix.columns)
+        if gridMatrix.inBounds(source) and gridMatrix.inBounds(target):
+            steps = cls._solveSteps(gridMatrix, source, target, trace)
+            if lazy:
+                trace.follow(steps)
+            else:
+                for _ in steps:
+                    pass
+
+        return trace
+
+
     @staticmethod
     @abstractmethod
-    def getSolveQueue(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> SolveQueue:
+    def _solveSteps(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int],
+                    trace: SolveTrace) -> Iterator[None]:
+        # Records the search into `trace`, yielding after every expanded cell.
         pass    
 
 
@@ -52,17 +59,71 @@ class PathFindingAlgorithm(ABC):
         if target in cameFrom.keys():
             current: Tuple[int, int] = target
             path: List[Tuple[int, int]] = []
-            while current != source: 
+            # Bidirectional searches also grow a tree from the target, whose root has no parent either.
+            while current != source and cameFrom[current] is not None: 
                 path.append(current)
                 current = cameFrom[current]
                 
-            path.append(source) 
+            path.append(current) 
             path.reverse() 
             return path
         else:
             return None
 
 
+    @staticmethod
+    def _reconstructIndexPath(parents: Sequence[int], columns: int,
+                     source: Tuple[int, int], target: Tuple[int, int]) -> List[Tuple[int, int]]:
+
+        start = source[0] * columns + source[1]
+        current = target[0] * columns + target[1]
+        if parents[current] < 0:
+            return None
+
+        path: List[Tuple[int, int]] = []
+        while current != start:
+            path.append(divmod(current, columns))
+            current = parents[current]
+
+        path.append(source)
+        path.reverse()
+        return path
+
+
+    @staticmethod
+    def _searchIndices(search: Callable[[GridMatrix, int, int], Tuple[Sequence[int], int]], gridMatrix: GridMatrix,
+                       source: Tuple[int, int], target: Tuple[int, int], reportsRegion: bool = False) -> SearchResult:
+        if not (gridMatrix.inBounds(source) and gridMatrix.inBounds(target)):
+            return SearchResult(None, 0)
+
+        parents, expanded = search(gridMatrix, gridMatrix.index(source), gridMatrix.index(target))
+        path = PathFindingAlgorithm._reconstructIndexPath(parents, gridMatrix.columns, source, target)
+        return SearchResult(path, expanded, parents if reportsRegion else None)
+
+
+    @staticmethod
+    def _traceKernel(steps: Iterator[Tuple[Any, ...]], gridMatrix: GridMatrix, source: Tuple[int, int],
+                     trace: SolveTrace, target: Optional[Tuple[int, int]] = None) -> Iterator[None]:
+        # Records a `SearchKernel` step generator into `trace`, so the animation shows the very search
+        # `search` runs. Every expanded cell is followed by its neighbors in search order; those whose
+        # parent it has become were discovered by it, the others only examined.
+        # With `target` the steps are those of a bidirectional search and both trees are recorded:
+        # cells of the backward tree lead to the target instead of the source.
+        columns = gridMatrix.columns
+        openDirections = gridMatrix.openDirections
+        moves = [tuple((offset, SolveTrace.direction(dx, dy)) for offset, dx, dy in key)
+            for key in gridMatrix.neighborIndexOffsets()]
+
+        trace.root(source)
+        if target is not None:
+            trace.root(target)
+
+        for current, *parents in steps:
+            x, y = divmod(current, columns)
+            trace.expandNeighbors(current, moves[openDirections[current] | ((x + y) & 1) << 4], *parents)
+            yield
+
+
     @staticmethod
     def _getCost(fromNode: Tuple[int, int], toNode: Tuple[int, int]) -> float:
         prevCost = 1
@@ -79,196 +140,102 @@ class PathFindingAlgorithm(ABC):
 class BreadthFirstSearchAlgorithm(PathFindingAlgorithm):
 
     @staticmethod
-    def solve(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]):
-        frontier = Queue()
+    def search(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> SearchResult:
+        return PathFindingAlgorithm._searchIndices(SearchKernel.breadthFirst, gridMatrix, source, target, True)
 
-        frontier.put(source)
-        cameFrom: Dict[Tuple(int, int), Optional[Tuple(int, int)]] = {}
 
-        cameFrom[source] = None
+    @staticmethod
+    def _solveSteps(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int],
+                    trace: SolveTrace) -> Iterator[None]:
+        steps = SearchKernel.breadthFirstSteps(gridMatrix, gridMatrix.index(source), gridMatrix.index(target))
+        return PathFindingAlgorithm._traceKernel(steps, gridMatrix, source, trace)
 
-        
-        while not frontier.empty():
-            current = frontier.get()
-            if current == target:
-                break
-            
-            for next in gridMatrix.neighbors(current):
-                if next not in cameFrom:
-                    frontier.put(next)
-                    cameFrom[next] = current
-        
 
-        
-        return PathFindingAlgorithm._reconstructPath(cameFrom, source, target)
 
+class DijkstraSearchAlgorithm(PathFindingAlgorithm):
 
     @staticmethod
-    def getSolveQueue(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> SolveQueue:
-        frontier = Queue()
-        frontier.put(source)
-        cameFrom: Dict[Tuple(int, int), Optional[Tuple(int, int)]] = {}
-        cameFrom[source] = None
-
-        queue = SolveQueue()
-        
-        while not frontier.empty():
+    def search(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> SearchResult:
+        return PathFindingAlgorithm._searchIndices(SearchKernel.dijkstra, gridMatrix, source, target, True)
 
-            current = frontier.get()
-            if current == target:
-                break
-            
-            selected = set()
 
-            for next in gridMatrix.neighbors(current):
+    @staticmethod
+    def _solveSteps(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int],
+                    trace: SolveTrace) -> Iterator[None]:
+        steps = SearchKernel.bestFirstSteps(gridMatrix, gridMatrix.index(source), gridMatrix.index(target), False)
+        return PathFindingAlgorithm._traceKernel(steps, gridMatrix, source, trace)
 
-                queue.enqueue(selected, cameFrom, next)
 
-                if next not in cameFrom:
-                    selected.add(next)
 
-                    frontier.put(next)
-                    cameFrom[next] = current
+class AStarAlgorithm(PathFindingAlgorithm):
     
-
-        return queue
+    @staticmethod
+    def _heuristic(a: Tuple[int, int], b: Tuple[int, int]) -> float:
+        (x1, y1) = a
+        (x2, y2) = b
+        return abs(x1 - x2) + abs(y1 - y2)
 
 
+    @staticmethod
+    def search(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> SearchResult:
+        return PathFindingAlgorithm._searchIndices(SearchKernel.aStar, gridMatrix, source, target, True)
 
-class DijkstraSearchAlgorithm(PathFindingAlgorithm):
 
     @staticmethod
-    def solve(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]):
-        frontier = PriorityQueue()
-        frontier.put((0, source))
-        
-        cameFrom: Dict[Tuple(int, int), Optional[Tuple(int, int)]] = {}
-        costSoFar: Dict[Tuple(int, int), float] = {}
-        cameFrom[source] = None
-        costSoFar[source] = 0
-        
-        while not frontier.empty():
-            _, current = frontier.get()
-            
-            if current == target:
-                break
-            
-
-            for next in gridMatrix.neighbors(current):
-                newCost = costSoFar[current] + PathFindingAlgorithm._getCost(current, next)
-               
-                if next not in costSoFar or newCost < costSoFar[next]:
-                    costSoFar[next] = newCost
-                    priority = newCost 
-                    frontier.put((priority, next))
-                    cameFrom[next] = current
-        
+    def _solveSteps(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int],
+                    trace: SolveTrace) -> Iterator[None]:
+        steps = SearchKernel.bestFirstSteps(gridMatrix, gridMatrix.index(source), gridMatrix.index(target), True)
+        return PathFindingAlgorithm._traceKernel(steps, gridMatrix, source, trace)
 
 
-        return PathFindingAlgorithm._reconstructPath(cameFrom, source, target)
 
+class BidirectionalBreadthFirstSearchAlgorithm(PathFindingAlgorithm):
 
     @staticmethod
-    def getSolveQueue(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> SolveQueue:
-        frontier = PriorityQueue()
-        frontier.put((0, source))
-        
-        cameFrom: Dict[Tuple(int, int), Optional[Tuple(int, int)]] = {}
-        costSoFar: Dict[Tuple(int, int), float] = {}
+    def search(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> SearchResult:
+        return PathFindingAlgorithm._searchIndices(SearchKernel.bidirectionalBreadthFirst, gridMatrix, source, target)
 
-        cameFrom[source] = None
-        costSoFar[source] = 0
 
-        queue = SolveQueue()
-        
-        while not frontier.empty():
-            _, current = frontier.get()
-            if current == target:
-                break
-            
-            selected = set()
-
-            for next in gridMatrix.neighbors(current):
-                newCost = costSoFar[current] + PathFindingAlgorithm._getCost(current, next)
-                queue.enqueue(selected, cameFrom, next)
-                if next not in costSoFar or newCost < costSoFar[next]:
-                    selected.add(next)
-                    costSoFar[next] = newCost
-                    priority = newCost 
-                    frontier.put((priority, next))
-                    cameFrom[next] = current
-    
+    @staticmethod
+    def _solveSteps(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int],
+                    trace: SolveTrace) -> Iterator[None]:
+        steps = SearchKernel.bidirectionalBreadthFirstSteps(gridMatrix, gridMatrix.index(source), gridMatrix.index(target))
+        return PathFindingAlgorithm._traceKernel(steps, gridMatrix, source, trace, target)
 
-        return queue
 
 
+class BidirectionalAStarAlgorithm(PathFindingAlgorithm):
 
-class AStarAlgorithm(PathFindingAlgorithm):
-    
     @staticmethod
-    def _heuristic(a: Tuple[int, int], b: Tuple[int, int]) -> float:
-        (x1, y1) = a
-        (x2, y2) = b
-        return abs(x1 - x2) + abs(y1 - y2)
+    def search(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> SearchResult:
+        return PathFindingAlgorithm._searchIndices(SearchKernel.bidirectionalAStar, gridMatrix, source, target)
 
 
     @staticmethod
-    def solve(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> List[Tuple[int, int]]:
-        frontier = PriorityQueue()
-        frontier.put((0, source))
-        cameFrom: Dict[Tuple(int, int), Optional[Tuple(int, int)]] = {}
-        costSoFar: Dict[Tuple(int, int), float] = {}
-        cameFrom[source] = None
-        costSoFar[source] = 0
-        
-        while not frontier.empty():
-            _, current = frontier.get()
-            
-            if current == target:
-                break
-            
-            for next in gridMatrix.neighbors(current):
-                newCost = costSoFar[current] + PathFindingAlgorithm._getCost(current, next)
-                if next not in costSoFar or newCost < costSoFar[next]:
-                    costSoFar[next] = newCost
-                    priority = newCost + AStarAlgorithm._heuristic(next, target)
-                    frontier.put((priority, next))
-                    cameFrom[next] = current
-        
-        return PathFindingAlgorithm._reconstructPath(cameFrom, source, target)
-
+    def _solveSteps(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int],
+                    trace: SolveTrace) -> Iterator[None]:
+        steps = SearchKernel.bidirectionalAStarSteps(gridMatrix, gridMatrix.index(source), gridMatrix.index(target))
+        return PathFindingAlgorithm._traceKernel(steps, gridMatrix, source, trace, target)
 
-    @staticmethod
-    def getSolveQueue(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> SolveQueue:
-        frontier = PriorityQueue()
-        frontier.put((0, source))
-        
-        cameFrom: Dict[Tuple(int, int), Optional[Tuple(int, int)]] = {}
-        costSoFar: Dict[Tuple(int, int), float] = {}
 
-        cameFrom[source] = None
-        costSoFar[source] = 0
 
-        queue = SolveQueue()
-        
-        while not frontier.empty():
-            _, current = frontier.get()
-            if current == target:
-                break
-            
-            selected = set()
-
-            for next in gridMatrix.neighbors(current):
-                newCost = costSoFar[current] + PathFindingAlgorithm._getCost(current, next)
-                queue.enqueue(selected, cameFrom, next)
-                if next not in costSoFar or newCost < costSoFar[next]:
-                    selected.add(next)
-                    costSoFar[next] = newCost
-                    priority = newCost + AStarAlgorithm._heuristic(next, target)
-                    frontier.put((priority, next))
-                    cameFrom[next] = current
-    
+class JumpPointSearchAlgorithm(PathFindingAlgorithm):
 
-        return queue
+    @staticmethod
+    def search(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int]) -> SearchResult:
+        return PathFindingAlgorithm._searchIndices(SearchKernel.jumpPointSearch, gridMatrix, source, target)
 
 
+    @staticmethod
+    def _solveSteps(gridMatrix: GridMatrix, source: Tuple[int, int], target: Tuple[int, int],
+                    trace: SolveTrace) -> Iterator[None]:
+        # Only jump points take part in the animation, each one is linked to the jump point it was reached from.
+        trace.root(source)
+
+        for current, discovered in SearchKernel.jumpPointSteps(gridMatrix, gridMatrix.index(source), gridMatrix.index(target)):
+            parent = divmod(current, gridMatrix.columns)
+            trace.expand(parent)
+            for next in discovered:
+                trace.check(divmod(next, gridMatrix.columns), parent)
+
+            yield
@@ -0,0 +1,473 @@
+from Grid.GridMap import GridMatrix
+
+from array import array
+from collections import deque
+from heapq import heappop, heappush
+from typing import *
+
+
+class SearchKernel():
+    # Costs are kept as integers scaled by `costScale`: a step costs 1000, or 1001 when
+    # `PathFindingAlgorithm._getCost` applies its checkerboard nudge.
+    costScale: int = 1000
+
+
+    @staticmethod
+    def _moves(gridMatrix: GridMatrix, reverse: bool = False) -> List[Tuple[Tuple[int, int, int, int], ...]]:
+        # Indexed by `mask | parity << 4` like `GridMatrix.neighborIndexOffsets`, with the
+        # scaled step cost appended: vertical steps from even cells and horizontal steps
+        # from odd cells are nudged. With `reverse` the cost is that of the step from the
+        # neighbor back to the cell, which is what a search from the target needs.
+        return [
+            tuple((offset, dx, dy, SearchKernel.costScale + ((dx != 0) == (key >> 4 == reverse)))
+                for offset, dx, dy in moves)
+            for key, moves in enumerate(gridMatrix.neighborIndexOffsets())]
+
+
+    @staticmethod
+    def _trivial(gridMatrix: GridMatrix, source: int) -> Tuple[array, int]:
+        parents = array('i', [-1]) * (gridMatrix.rows * gridMatrix.columns)
+        parents[source] = source
+        return (parents, 0)
+
+
+    @staticmethod
+    def _join(forward: array, backward: array, meeting: int, target: int) -> None:
+        # Re-links the backward tree from the meeting cell to the target into `forward`,
+        # so the whole path can be read from the target back to the source.
+        current = meeting
+        while current != target:
+            next = backward[current]
+            forward[next] = current
+            current = next
+
+
+    @staticmethod
+    def _run(steps: Generator[Any, None, Tuple[array, int]]) -> Tuple[array, int]:
+        # Drives a step generator to its end and returns its result.
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+
+    @staticmethod
+    def breadthFirst(gridMatrix: GridMatrix, source: int, target: int) -> Tuple[array, int]:
+        return SearchKernel._run(SearchKernel.breadthFirstSteps(gridMatrix, source, target, False))
+
+
+    @staticmethod
+    def breadthFirstSteps(gridMatrix: GridMatrix, source: int, target: int,
+                          record: bool = True) -> Generator[Tuple[int, array], None, Tuple[array, int]]:
+        # With `record` yields every expanded cell with the parents as they are right after its expansion:
+        # the neighbors whose parent is that cell are the ones it discovered, the others were only examined.
+        # Without it nothing is yielded, the search runs to its end on the first `next`.
+        columns = gridMatrix.columns
+        openDirections = gridMatrix.openDirections
+        moves = SearchKernel._moves(gridMatrix)
+
+        parents = array('i', [-1]) * (gridMatrix.rows * columns)
+        parents[source] = source
+        frontier = deque([source])
+        expanded = 0
+
+        while frontier:
+            current = frontier.popleft()
+            if current == target:
+                break
+
+            expanded += 1
+            x, y = divmod(current, columns)
+            for offset, _, _, _ in moves[openDirections[current] | ((x + y) & 1) << 4]:
+                next = current + offset
+                if parents[next] < 0:
+                    parents[next] = current
+                    frontier.append(next)
+
+            if record:
+                yield (current, parents)
+
+        return (parents, expanded)
+
+
+    @staticmethod
+    def bestFirst(gridMatrix: GridMatrix, source: int, target: int, heuristic: bool) -> Tuple[array, int]:
+        return SearchKernel._run(SearchKernel.bestFirstSteps(gridMatrix, source, target, heuristic, False))
+
+
+    @staticmethod
+    def bestFirstSteps(gridMatrix: GridMatrix, source: int, target: int, heuristic: bool,
+                       record: bool = True) -> Generator[Tuple[int, array], None, Tuple[array, int]]:
+        # Yields like `breadthFirstSteps`; a closed cell is expanded once, so a neighbor whose parent
+        # is the expanded cell was reached more cheaply through it during that expansion.
+        # Dijkstra without `heuristic`, A* with the Manhattan distance otherwise. Both
+        # heuristics are consistent, so a closed cell never has to be reopened and stale
+        # heap entries are simply skipped.
+        columns = gridMatrix.columns
+        size = gridMatrix.rows * columns
+        openDirections = gridMatrix.openDirections
+        moves = SearchKernel._moves(gridMatrix)
+        scale = SearchKernel.costScale if heuristic else 0
+        targetX, targetY = divmod(target, columns)
+
+        parents = array('i', [-1]) * size
+        costs = array('q', [-1]) * size
+        closed = bytearray(size)
+        parents[source] = source
+        costs[source] = 0
+        frontier = [(0, source)]
+        expanded = 0
+
+        while frontier:
+            _, current = heappop(frontier)
+            if current == target:
+                break
+
+            if closed[current]:
+                continue
+
+            closed[current] = 1
+            expanded += 1
+            x, y = divmod(current, columns)
+            costSoFar = costs[current]
+
+            for offset, dx, dy, cost in moves[openDirections[current] | ((x + y) & 1) << 4]:
+                next = current + offset
+                newCost = costSoFar + cost
+                known = costs[next]
+                if known < 0 or newCost < known:
+                    costs[next] = newCost
+                    parents[next] = current
+                    heappush(frontier, (newCost + scale * (abs(x + dx - targetX) + abs(y + dy - targetY)), next))
+
+            if record:
+                yield (current, parents)
+
+        return (parents, expanded)
+
+
+    @staticmethod
+    def dijkstra(gridMatrix: GridMatrix, source: int, target: int) -> Tuple[array, int]:
+        return SearchKernel.bestFirst(gridMatrix, source, target, False)
+
+
+    @staticmethod
+    def aStar(gridMatrix: GridMatrix, source: int, target: int) -> Tuple[array, int]:
+        return SearchKernel.bestFirst(gridMatrix, source, target, True)
+
+
+    @staticmethod
+    def bidirectionalBreadthFirst(gridMatrix: GridMatrix, source: int, target: int) -> Tuple[array, int]:
+        return SearchKernel._run(SearchKernel.bidirectionalBreadthFirstSteps(gridMatrix, source, target, False))
+
+
+    @staticmethod
+    def bidirectionalBreadthFirstSteps(gridMatrix: GridMatrix, source: int, target: int,
+                                       record: bool = True) -> Generator[Tuple[int, array, array], None, Tuple[array, int]]:
+        # Both sides expand whole layers, always the smaller one. The first cell discovered
+        # by both sides closes a shortest path: a shorter one would have met in a previous layer.
+        # With `record` yields like `breadthFirstSteps`, with the parents of the side that expanded
+        # the cell and then those of the other side.
+        if source == target:
+            return SearchKernel._trivial(gridMatrix, source)
+
+        if gridMatrix.buffer[target]:
+            # The forward search can never enter a wall, the backward one would start inside it.
+            return (array('i', [-1]) * (gridMatrix.rows * gridMatrix.columns), 0)
+
+        columns = gridMatrix.columns
+        size = gridMatrix.rows * columns
+        openDirections = gridMatrix.openDirections
+        moves = SearchKernel._moves(gridMatrix)
+
+        forward = array('i', [-1]) * size
+        backward = array('i', [-1]) * size
+        forward[source] = source
+        backward[target] = target
+        forwardLayer = [source]
+        backwardLayer = [target]
+        meeting = -1
+        expanded = 0
+
+        while meeting < 0 and forwardLayer and backwardLayer:
+            if len(forwardLayer) <= len(backwardLayer):
+                layer, parents, other = forwardLayer, forward, backward
+            else:
+                layer, parents, other = backwardLayer, backward, forward
+
+            nextLayer = []
+            for current in layer:
+                expanded += 1
+                x, y = divmod(current, columns)
+                # The cell where the sides meet is still expanded to its end, which keeps every step whole.
+                for offset, _, _, _ in moves[openDirections[current] | ((x + y) & 1) << 4]:
+                    next = current + offset
+                    if parents[next] < 0:
+                        parents[next] = current
+                        nextLayer.append(next)
+                        if meeting < 0 and other[next] >= 0:
+                            meeting = next
+
+                if record:
+                    yield (current, parents, other)
+
+                if meeting >= 0:
+                    break
+
+            if parents is forward:
+                forwardLayer = nextLayer
+            else:
+                backwardLayer = nextLayer
+
+        if meeting >= 0:
+            SearchKernel._join(forward, backward, meeting, target)
+
+        return (forward, expanded)
+
+
+    @staticmethod
+    def bidirectionalAStar(gridMatrix: GridMatrix, source: int, target: int) -> Tuple[array, int]:
+        return SearchKernel._run(SearchKernel.bidirectionalAStarSteps(gridMatrix, source, target, False))
+
+
+    @staticmethod
+    def bidirectionalAStarSteps(gridMatrix: GridMatrix, source: int, target: int,
+                                record: bool = True) -> Generator[Tuple[int, array, array], None, Tuple[array, int]]:
+        # Yields like `bidirectionalBreadthFirstSteps`.
+        # Both sides share the balanced potential p(v) = (h(v, target) - h(source, v)) / 2, the
+        # forward side keyed by g + p and the backward one by g - p. Keys are doubled to stay integer.
+        # Both searches then run on the same non-negative reduced costs, so `best`, the cheapest
+        # connection seen so far, is optimal once the two smallest keys add up to it.
+        if source == target:
+            return SearchKernel._trivial(gridMatrix, source)
+
+        if gridMatrix.buffer[target]:
+            # The forward search can never enter a wall, the backward one would start inside it.
+            return (array('i', [-1]) * (gridMatrix.rows * gridMatrix.columns), 0)
+
+        columns = gridMatrix.columns
+        size = gridMatrix.rows * columns
+        openDirections = gridMatrix.openDirections
+        scale = SearchKernel.costScale
+        sourceX, sourceY = divmod(source, columns)
+        targetX, targetY = divmod(target, columns)
+
+        def potential(x: int, y: int) -> int:
+            return scale * (abs(x - targetX) + abs(y - targetY) - abs(x - sourceX) - abs(y - sourceY))
+
+        sides = []
+        for start, sign, reverse in ((source, 1, False), (target, -1, True)):
+            parents = array('i', [-1]) * size
+            costs = array('q', [-1]) * size
+            parents[start] = start
+            costs[start] = 0
+            sides.append((parents, costs, bytearray(size), [(sign * potential(*divmod(start, columns)), start)],
+                sign, SearchKernel._moves(gridMatrix, reverse)))
+
+        forwardFrontier, backwardFrontier = sides[0][3], sides[1][3]
+        best = -1
+        meeting = -1
+        expanded = 0
+
+        while forwardFrontier and backwardFrontier:
+            if best >= 0 and forwardFrontier[0][0] + backwardFrontier[0][0] >= 2 * best:
+                break
+
+            side = 0 if len(forwardFrontier) <= len(backwardFrontier) else 1
+            parents, costs, closed, frontier, sign, moves = sides[side]
+            otherCosts = sides[1 - side][1]
+
+            _, current = heappop(frontier)
+            if closed[current]:
+                continue
+
+            closed[current] = 1
+            expanded += 1
+            x, y = divmod(current, columns)
+            costSoFar = costs[current]
+
+            for offset, dx, dy, cost in moves[openDirections[current] | ((x + y) & 1) << 4]:
+                next = current + offset
+                newCost = costSoFar + cost
+                known = costs[next]
+                if known < 0 or newCost < known:
+                    costs[next] = newCost
+                    parents[next] = current
+                    heappush(frontier, (2 * newCost + sign * potential(x + dx, y + dy), next))
+
+                    if otherCosts[next] >= 0 and (best < 0 or newCost + otherCosts[next] < best):
+                        best = newCost + otherCosts[next]
+                        meeting = next
+
+            if record:
+                yield (current, parents, sides[1 - side][0])
+
+        forward, backward = sides[0][0], sides[1][0]
+        if meeting >= 0:
+            SearchKernel._join(forward, backward, meeting, target)
+
+        return (forward, expanded)
+
+
+    @staticmethod
+    def _jumpHorizontal(cells: bytearray, rows: int, columns: int, x: int, y: int, dy: int, target: int) -> int:
+        # Scans row `x` from column `y` in direction `dy` and returns the index of the first jump point:
+        # the target, or a cell with a forced vertical neighbor, i.e. a free cell above or below whose
+        # predecessor in that row is a wall. All scans are substring searches on the flat buffer.
+        rowStart = x * columns
+        current = rowStart + y
+        targetRow, targetColumn = divmod(target, columns)
+
+        if dy > 0:
+            wall = cells.find(1, current + 1, rowStart + columns)
+            end = rowStart + columns if wall < 0 else wall
+            found = end
+            if targetRow == x and y < targetColumn:
+                found = min(found, target)
+
+            for neighborStart in (rowStart - columns, rowStart + columns):
+                if 0 <= neighborStart < rows * columns:
+                    forced = cells.find(b'\x01\x00', neighborStart + y, neighborStart + end - rowStart)
+                    if forced >= 0:
+                        found = min(found, forced + 1 - neighborStart + rowStart)
+
+            return -1 if found == end else found
+
+        else:
+            wall = cells.rfind(1, rowStart, current)
+            end = rowStart - 1 if wall < 0 else wall
+            found = end
+            if targetRow == x and targetColumn < y:
+                found = max(found, target)
+
+            for neighborStart in (rowStart - columns, rowStart + columns):
+                if 0 <= neighborStart < rows * columns:
+                    forced = cells.rfind(b'\x00\x01', neighborStart + end + 1 - rowStart, neighborStart + y + 1)
+                    if forced >= 0:
+                        found = max(found, forced - neighborStart + rowStart)
+
+            return -1 if found == end else found
+
+
+    @staticmethod
+    def _jumpVertical(cells: bytearray, rows: int, columns: int, x: int, y: int, dx: int, target: int) -> int:
+        # Walks column `y` from row `x` in direction `dx`. Vertical moves may turn sideways anywhere,
+        # so a cell is a jump point as soon as a horizontal jump from it finds one.
+        x += dx
+        while 0 <= x < rows:
+            current = x * columns + y
+            if cells[current]:
+                return -1
+
+            if current == target or SearchKernel._jumpHorizontal(cells, rows, columns, x, y, 1, target) >= 0 or (
+                    SearchKernel._jumpHorizontal(cells, rows, columns, x, y, -1, target) >= 0):
+                return current
+
+            x += dx
+
+        return -1
+
+
+    @staticmethod
+    def jumpPointSearch(gridMatrix: GridMatrix, source: int, target: int) -> Tuple[array, int]:
+        return SearchKernel._run(SearchKernel.jumpPointSteps(gridMatrix, source, target))
+
+
+    @staticmethod
+    def jumpPointSteps(gridMatrix: GridMatrix, source: int, target: int) -> Generator[Tuple[int, List[int]], None, Tuple[array, int]]:
+        # Jump Point Search for 4-connected uniform-cost grids. Canonical paths turn from vertical to
+        # horizontal anywhere but from horizontal to vertical only around a wall corner, so A* expands
+        # jump points only and steps over the straight runs between them.
+        # Yields every expanded jump point with the jump points it discovered, returns like the other searches.
+        columns = gridMatrix.columns
+        rows = gridMatrix.rows
+        size = rows * columns
+        cells = gridMatrix._cells
+        scale = SearchKernel.costScale
+        targetX, targetY = divmod(target, columns)
+
+        parents = array('i', [-1]) * size
+        if source == target:
+            parents[source] = source
+            return (parents, 0)
+
+        if cells[target]:
+            return (parents, 0)
+
+        costs = array('q', [-1]) * size
+        closed = bytearray(size)
+        parents[source] = source
+        costs[source] = 0
+        frontier = [(0, 0, source)]
+        expanded = 0
+
+        while frontier:
+            _, _, current = heappop(frontier)
+            if current == target:
+                break
+
+            if closed[current]:
+                continue
+
+            closed[current] = 1
+            expanded += 1
+            x, y = divmod(current, columns)
+
+            if current == source:
+                directions = ((1, 0), (-1, 0), (0, -1), (0, 1))
+            else:
+                parentX, parentY = divmod(parents[current], columns)
+                if parentX == x:
+                    # Reached horizontally: keep going, and turn only where the wall behind ends.
+                    dy = 1 if y > parentY else -1
+                    directions = [(0, dy)] + [
+                        (dx, 0) for dx in (1, -1)
+                        if 0 <= x + dx < rows and not cells[current + dx * columns] and cells[current + dx * columns - dy]]
+                else:
+                    dx = 1 if x > parentX else -1
+                    directions = ((dx, 0), (0, -1), (0, 1))
+
+            discovered = []
+            for dx, dy in directions:
+                if dx:
+                    next = SearchKernel._jumpVertical(cells, rows, columns, x, y, dx, target)
+                else:
+                    next = SearchKernel._jumpHorizontal(cells, rows, columns, x, y, dy, target)
+
+                if next < 0:
+                    continue
+
+                nextX, nextY = divmod(next, columns)
+                newCost = costs[current] + scale * (abs(nextX - x) + abs(nextY - y))
+                known = costs[next]
+                if known < 0 or newCost < known:
+                    costs[next] = newCost
+                    parents[next] = current
+                    discovered.append(next)
+                    # Ties on f are broken towards the target: open areas are full of equal-f jump points.
+                    distance = scale * (abs(nextX - targetX) + abs(nextY - targetY))
+                    heappush(frontier, (newCost + distance, distance, next))
+
+            yield (current, discovered)
+
+        if parents[target] >= 0:
+            SearchKernel._fillJumps(parents, columns, source, target)
+
+        return (parents, expanded)
+
+
+    @staticmethod
+    def _fillJumps(parents: array, columns: int, source: int, target: int) -> None:
+        # Parents of jump points skip straight runs; links every cell of the final path to its
+        # actual predecessor so the path can be read cell by cell.
+        jumpPoints = [target]
+        while jumpPoints[-1] != source:
+            jumpPoints.append(parents[jumpPoints[-1]])
+
+        for current, parent in zip(jumpPoints, jumpPoints[1:]):
+            step = columns if abs(current - parent) >= columns else 1
+            step = step if current > parent else -step
+            while current != parent:
+                parents[current] = current - step
+                current -= step
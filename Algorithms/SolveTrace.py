@@ -0,0 +1,403 @@
+from array import array
+from typing import *
+import re
+import zlib
+
+
+# Neighbor directions in the order of `GridMatrix.neighbors` on odd cells.
+_DIRECTIONS: Tuple[Tuple[int, int], ...] = ((1, 0), (-1, 0), (0, -1), (0, 1))
+
+# The state of a cell is one byte: its status in bits 0-1 and the code of its parent in bits 2-4.
+# A parent code is 0 for no parent, 1 + the direction towards a neighboring parent, `_ROOT` for
+# a search root and `_FAR` for a parent further away, kept in a separate dictionary.
+_ROOT = 5
+_FAR = 6
+_STATUS = bytes(i & 3 for i in range(256))
+
+
+class SolveTrace():
+    # An append-only log of a search, one byte per event:
+    #   0pppp1dd  neighbor `dd` of the expanded cell gets it as parent, `pppp` is its previous state
+    #   000000dd  neighbor `dd` of the expanded cell is examined without changes
+    #   100000ss  the next cell of `_expanded` is expanded, `ss` is its previous status
+    #   110000ss  the next cell of `_farCells` gets the next parent of `_farParents`, for roots and
+    #             parents that are not neighbors; the previous parent is in `_farPrevious`
+    # A previous state `pppp` is 0 for an unseen cell, otherwise 1 + 2 * (parent code - 1) + closed.
+    # Every `keyframeInterval` events the states of all cells are stored compressed, so a cursor
+    # can seek anywhere by replaying at most that many events and step back by undoing them.
+    unseen: int = 0
+    open: int = 1
+    closed: int = 2
+
+    class Keyframe():
+        # `codes` is None for the empty state before the first event.
+        def __init__(self, position: int, expansions: int, far: int, codes: Optional[bytes], farParents: array):
+            self.position = position
+            self.expansions = expansions
+            self.far = far
+            self.codes = codes
+            self.farParents = farParents
+
+
+    class Cursor():
+        def __init__(self, trace: "SolveTrace"):
+            self.trace = trace
+            self.position = 0
+            self._expansions = 0
+            self._far = 0
+            self.codes = bytearray(trace.rows * trace.columns)
+            self.farParents: Dict[int, int] = {}
+
+
+        def __len__(self) -> int:
+            return len(self.trace)
+
+
+        def seek(self, step: int) -> None:
+            step = max(0, min(step, self.trace.extend(step)))
+            keyframe = self.trace._keyframeBefore(step)
+
+            # Undoing and replaying cost the same per event, the keyframe is used when it is closer.
+            if step < self.position:
+                if self.position - step > step - keyframe.position:
+                    self._restore(keyframe)
+            elif keyframe.position > self.position:
+                self._restore(keyframe)
+
+            while self.position > step:
+                self._undo()
+            while self.position < step:
+                self._apply()
+
+
+        def stepForward(self) -> bool:
+            if self.position >= self.trace.extend(self.position + 1):
+                return False
+            self._apply()
+            return True
+
+
+        def stepBack(self) -> bool:
+            if self.position == 0:
+                return False
+            self._undo()
+            return True
+
+
+        def _restore(self, keyframe: "SolveTrace.Keyframe") -> None:
+            self.position = keyframe.position
+            self._expansions = keyframe.expansions
+            self._far = keyframe.far
+            if keyframe.codes is None:
+                self.codes = bytearray(self.trace.rows * self.trace.columns)
+            else:
+                self.codes = bytearray(zlib.decompress(keyframe.codes))
+            self.farParents = dict(zip(keyframe.farParents[::2], keyframe.farParents[1::2]))
+
+
+        def _setParent(self, cell: int, parent: int, status: int) -> None:
+            code = self.trace._parentCode(cell, parent)
+            self.codes[cell] = status | code << 2
+            if code == _FAR:
+                self.farParents[cell] = parent
+            else:
+                self.farParents.pop(cell, None)
+
+
+        def _apply(self) -> None:
+            trace = self.trace
+            event = trace._events[self.position]
+            self.position += 1
+
+            if event < 0x80:
+                if event & 4:
+                    expanded = trace._expanded[self._expansions - 1]
+                    cell = expanded + trace._offsets[event & 3]
+                    self.codes[cell] = SolveTrace.open | (1 + (event & 3 ^ 1)) << 2
+            elif event < 0xc0:
+                cell = trace._expanded[self._expansions]
+                self._expansions += 1
+                self.codes[cell] = self.codes[cell] & ~3 | SolveTrace.closed
+            else:
+                self._setParent(trace._farCells[self._far], trace._farParents[self._far], SolveTrace.open)
+                self._far += 1
+
+
+        def _undo(self) -> None:
+            trace = self.trace
+            self.position -= 1
+            event = trace._events[self.position]
+
+            if event < 0x80:
+                if event & 4:
+                    expanded = trace._expanded[self._expansions - 1]
+                    cell = expanded + trace._offsets[event & 3]
+                    previous = event >> 3
+                    self.codes[cell] = 0 if previous == 0 else (previous - 1 & 1) + 1 | ((previous - 1 >> 1) + 1) << 2
+            elif event < 0xc0:
+                self._expansions -= 1
+                cell = trace._expanded[self._expansions]
+                self.codes[cell] = self.codes[cell] & ~3 | event & 3
+            else:
+                self._far -= 1
+                cell, previous = trace._farCells[self._far], trace._farPrevious[self._far]
+                if previous < 0:
+                    self.codes[cell] = event & 3
+                    self.farParents.pop(cell, None)
+                else:
+                    self._setParent(cell, previous, event & 3)
+
+
+        def status(self, cell: Tuple[int, int]) -> int:
+            return self.codes[cell[0] * self.trace.columns + cell[1]] & 3
+
+
+        def parent(self, cell: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+            # None for unseen cells and for roots.
+            index = cell[0] * self.trace.columns + cell[1]
+            code = self.codes[index] >> 2
+            if code == 0 or code == _ROOT:
+                return None
+            elif code == _FAR:
+                return divmod(self.farParents[index], self.trace.columns)
+            else:
+                dx, dy = _DIRECTIONS[code - 1]
+                return (cell[0] + dx, cell[1] + dy)
+
+
+        def pathTo(self, cell: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+            # From the root of the tree `cell` belongs to, None if the cell has not been discovered.
+            if self.codes[cell[0] * self.trace.columns + cell[1]] >> 2 == 0:
+                return None
+
+            path = [cell]
+            current = self.parent(cell)
+            while current is not None:
+                path.append(current)
+                current = self.parent(current)
+
+            path.reverse()
+            return path
+
+
+        def current(self) -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+            # The cell being expanded and the cell examined by the last event, if any.
+            columns = self.trace.columns
+            expanded = divmod(self.trace._expanded[self._expansions - 1], columns) if self._expansions else None
+            if self.position == 0:
+                return (expanded, None)
+
+            event = self.trace._events[self.position - 1]
+            if event < 0x80:
+                dx, dy = _DIRECTIONS[event & 3]
+                return (expanded, (expanded[0] + dx, expanded[1] + dy))
+            elif event < 0xc0:
+                return (expanded, None)
+            else:
+                return (expanded, divmod(self.trace._farCells[self._far - 1], columns))
+
+
+        def cells(self, status: int) -> List[Tuple[int, int]]:
+            statuses = self.codes.translate(_STATUS)
+            columns = self.trace.columns
+            return [divmod(match.start(), columns) for match in re.finditer(re.escape(bytes([status])), statuses)]
+
+
+        def frontier(self) -> List[Tuple[int, int]]:
+            return self.cells(SolveTrace.open)
+
+
+        def discovered(self) -> List[Tuple[int, int]]:
+            return self.cells(SolveTrace.open) + self.cells(SolveTrace.closed)
+
+
+    def __init__(self, rows: int, columns: int, keyframeInterval: int = 1 << 16):
+        self.rows = rows
+        self.columns = columns
+        self.keyframeInterval = keyframeInterval
+        self._offsets = tuple(dx * columns + dy for dx, dy in _DIRECTIONS)
+
+        self._events = bytearray()
+        self._expanded = array('i')
+        self._farCells = array('i')
+        self._farParents = array('i')
+        self._farPrevious = array('i')
+        self._keyframes: List[SolveTrace.Keyframe] = [SolveTrace.Keyframe(0, 0, 0, None, array('i'))]
+        self._steps: Optional[Iterator[None]] = None
+
+        # The state after the last event, needed to record what each event overwrites.
+        self._codes = bytearray(rows * columns)
+        self._farCodes: Dict[int, int] = {}
+        self._current = -1
+
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+    @property
+    def nbytes(self) -> int:
+        # Size of the log itself, without the state kept for recording.
+        arrays = (self._expanded, self._farCells, self._farParents, self._farPrevious)
+        return len(self._events) + sum(len(i) * i.itemsize for i in arrays) + sum(
+            len(i.codes or b'') + len(i.farParents) * i.farParents.itemsize for i in self._keyframes)
+
+
+    def follow(self, steps: Iterator[None]) -> None:
+        # `steps` records the rest of the trace, it is advanced only when events past the end are read.
+        self._steps = steps
+
+
+    @property
+    def finished(self) -> bool:
+        return self._steps is None
+
+
+    def extend(self, length: int) -> int:
+        # Records events until there are `length` of them or the search ends, returns how many there are.
+        while self._steps is not None and len(self._events) < length:
+            try:
+                next(self._steps)
+            except StopIteration:
+                self._steps = None
+
+        return len(self._events)
+
+
+    def finish(self) -> int:
+        while self._steps is not None:
+            self.extend(len(self._events) + self.keyframeInterval)
+
+        return len(self._events)
+
+
+    @staticmethod
+    def direction(dx: int, dy: int) -> int:
+        # The direction code of a step to a neighbor, as `checkNeighbor` takes it.
+        return _DIRECTIONS.index((dx, dy))
+
+
+    def cursor(self) -> "SolveTrace.Cursor":
+        return SolveTrace.Cursor(self)
+
+
+    def _parentCode(self, cell: int, parent: int) -> int:
+        if cell == parent:
+            return _ROOT
+
+        (x, y), (i, j) = divmod(cell, self.columns), divmod(parent, self.columns)
+        if abs(x - i) + abs(y - j) == 1:
+            return 1 + _DIRECTIONS.index((i - x, j - y))
+        return _FAR
+
+
+    def _keyframeBefore(self, step: int) -> "SolveTrace.Keyframe":
+        return self._keyframes[min(step // self.keyframeInterval, len(self._keyframes) - 1)]
+
+
+    def _append(self, event: int) -> None:
+        self._events.append(event)
+        if len(self._events) % self.keyframeInterval == 0:
+            self._keyframe()
+
+
+    def _keyframe(self) -> None:
+        self._keyframes.append(SolveTrace.Keyframe(
+            len(self._events), len(self._expanded), len(self._farCells), zlib.compress(self._codes),
+            array('i', [i for item in self._farCodes.items() for i in item])))
+
+
+    def root(self, cell: Tuple[int, int]) -> None:
+        index = cell[0] * self.columns + cell[1]
+        self._far(index, index)
+
+
+    def expand(self, cell: Tuple[int, int]) -> None:
+        self.expandIndex(cell[0] * self.columns + cell[1])
+
+
+    def expandIndex(self, index: int) -> None:
+        self._current = index
+        self._expanded.append(index)
+        status = self._codes[index] & 3
+        self._codes[index] = self._codes[index] & ~3 | SolveTrace.closed
+        self._append(0x80 | status)
+
+
+    def check(self, cell: Tuple[int, int], parent: Optional[Tuple[int, int]] = None) -> None:
+        # `cell` is examined from the expanded cell; with `parent` it is also (re)discovered from it.
+        index = cell[0] * self.columns + cell[1]
+        if parent is not None:
+            parentIndex = parent[0] * self.columns + parent[1]
+            if parentIndex != self._current or self._parentCode(index, parentIndex) in (_ROOT, _FAR):
+                self._far(index, parentIndex)
+                return
+
+        direction = self._parentCode(self._current, index) - 1 if self._current >= 0 else -1
+        if not 0 <= direction < 4:
+            # Only discoveries change the state, other events away from the expanded cell are dropped.
+            return
+
+        self.checkNeighbor(index, direction, parent is not None)
+
+
+    def checkNeighbor(self, index: int, direction: int, discovered: bool) -> None:
+        # `check` for the neighbor of the expanded cell in `direction`, see `_DIRECTIONS`,
+        # for searches that already know which neighbor they are looking at.
+        event = self._discover(index, direction) if discovered else direction
+        if event >= 0:
+            self._append(event)
+
+
+    def expandNeighbors(self, index: int, moves: Sequence[Tuple[int, int]], parents: Sequence[int],
+                        other: Optional[Sequence[int]] = None) -> None:
+        # `expandIndex` followed by `checkNeighbor` for every `(index offset, direction)` of `moves`,
+        # in one call per expanded cell: the neighbors whose parent is now `index` were discovered by it.
+        # Bidirectional searches pass the parents of the other side too, whose cells keep their parent.
+        self.expandIndex(index)
+        events = self._events
+        interval = self.keyframeInterval
+        for offset, direction in moves:
+            cell = index + offset
+            discovered = parents[cell] == index and (other is None or other[cell] < 0)
+            event = self._discover(cell, direction) if discovered else direction
+            if event >= 0:
+                events.append(event)
+                if len(events) % interval == 0:
+                    self._keyframe()
+
+
+    def _discover(self, index: int, direction: int) -> int:
+        # Makes the expanded cell the parent of its neighbor and returns the event to append,
+        # or -1 when it had to be recorded as a far parent instead.
+        previous = self._codes[index]
+        if previous >> 2 == _FAR or (previous != 0 and previous >> 2 == 0):
+            self._far(index, self._current)
+            return -1
+
+        state = 0 if previous == 0 else 1 + 2 * ((previous >> 2) - 1) + (previous & 3 == SolveTrace.closed)
+        self._codes[index] = SolveTrace.open | (1 + (direction ^ 1)) << 2
+        return state << 3 | 4 | direction
+
+
+    def _far(self, cell: int, parent: int) -> None:
+        previous = self._codes[cell]
+        code = self._parentCode(cell, parent)
+        self._farCells.append(cell)
+        self._farParents.append(parent)
+        if previous >> 2 == 0:
+            self._farPrevious.append(-1)
+        elif previous >> 2 == _FAR:
+            self._farPrevious.append(self._farCodes[cell])
+        elif previous >> 2 == _ROOT:
+            self._farPrevious.append(cell)
+        else:
+            dx, dy = _DIRECTIONS[(previous >> 2) - 1]
+            self._farPrevious.append(cell + dx * self.columns + dy)
+
+        self._codes[cell] = SolveTrace.open | code << 2
+        if code == _FAR:
+            self._farCodes[cell] = parent
+        else:
+            self._farCodes.pop(cell, None)
+        self._append(0xc0 | previous & 3)
@@ -0,0 +1,235 @@
+from Algorithms.PathFindingAlgorithm import AStarAlgorithm, BidirectionalAStarAlgorithm, BidirectionalBreadthFirstSearchAlgorithm, BreadthFirstSearchAlgorithm, DijkstraSearchAlgorithm, JumpPointSearchAlgorithm, PathFindingAlgorithm
+from Algorithms.HierarchicalPathFinding import HierarchicalPathFindingAlgorithm
+from Algorithms.PathCache import PathCache
+from FileSystem.GridFileException import GridFileException
+from FileSystem.GridFileLoader import GridFileLoader
+
+from multiprocessing import Pool
+from typing import *
+import argparse
+import json
+import os
+import sys
+import time
+
+
+class BatchTask():
+    def __init__(self, file: Optional[str], queries: List[Tuple[str, Optional[Tuple[int, int]], Optional[Tuple[int, int]]]],
+                 error: Optional[str] = None, line: Optional[int] = None):
+        self.file = file
+        self.queries = queries
+        # A task file line that could not be read becomes a task with only an error to report.
+        self.error = error
+        self.line = line
+
+
+class BatchSolver():
+
+    algorithms: Dict[str, PathFindingAlgorithm] = {
+        "astar": AStarAlgorithm,
+        "dijkstra": DijkstraSearchAlgorithm,
+        "bfs": BreadthFirstSearchAlgorithm,
+        "biastar": BidirectionalAStarAlgorithm,
+        "bibfs": BidirectionalBreadthFirstSearchAlgorithm,
+        "jps": JumpPointSearchAlgorithm,
+        "hpa": HierarchicalPathFindingAlgorithm
+    }
+
+
+    # Set in every worker process by `_initWorker`; repeated queries on the same maze
+    # contents are answered from it, even when they come from different files.
+    pathCache: Optional[PathCache] = None
+
+
+    def __init__(self, processes: Optional[int] = None, chunkSize: int = 1, cacheBytes: int = 64 << 20):
+        self.processes = processes or os.cpu_count() or 1
+        self.chunkSize = chunkSize
+        self.cacheBytes = cacheBytes
+
+
+    @staticmethod
+    def _initWorker(cacheBytes: int) -> None:
+        BatchSolver.pathCache = PathCache(cacheBytes) if cacheBytes > 0 else None
+
+
+    @staticmethod
+    def _solveTask(task: BatchTask) -> List[Dict[str, Any]]:
+        # Runs in a worker process: the maze is loaded once and shared by all of its queries.
+        if task.error is not None:
+            return [{"file": task.file, "line": task.line, "error": task.error}]
+
+        try:
+            grid = GridFileLoader(task.file).load()
+        except GridFileException as e:
+            return [{"file": task.file, "algorithm": name, "error": str(e)} for name, _, _ in task.queries]
+
+        results = []
+        for name, source, target in task.queries:
+            # The defaults mirror the corners `SolverGridWidget` starts with.
+            source = source or (grid.rows - 1, grid.columns - 1)
+            target = target or (0, 0)
+            record = {"file": task.file, "algorithm": name, "source": list(source), "target": list(target)}
+
+            if name not in BatchSolver.algorithms:
+                record["error"] = f"Неизвестный алгоритм: {name}"
+                results.append(record)
+                continue
+
+            if not (grid.inBounds(source) and grid.inBounds(target)):
+                record["error"] = f"Точка вне лабиринта {grid.rows}x{grid.columns}"
+                results.append(record)
+                continue
+
+            start = time.perf_counter()
+            if BatchSolver.pathCache is None:
+                result = BatchSolver.algorithms[name].search(grid, source, target)
+            else:
+                hits = BatchSolver.pathCache.hits
+                result = BatchSolver.pathCache.search(BatchSolver.algorithms[name], grid, source, target)
+                record["cached"] = BatchSolver.pathCache.hits > hits
+            record["time"] = time.perf_counter() - start
+            record["length"] = None if result.path is None else len(result.path)
+            record["expanded"] = result.expanded
+            results.append(record)
+
+        return results
+
+
+    def run(self, tasks: Iterable[BatchTask], output: TextIO) -> int:
+        count = 0
+        with Pool(self.processes, BatchSolver._initWorker, (self.cacheBytes,)) as pool:
+            for results in pool.imap_unordered(BatchSolver._solveTask, tasks, self.chunkSize):
+                for record in results:
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    count += 1
+                output.flush()
+
+        return count
+
+
+    @staticmethod
+    def _parseCell(text: str) -> Tuple[int, int]:
+        try:
+            row, column = (int(i) for i in text.split(","))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Ожидалась точка вида 'строка,столбец': {text}")
+        return (row, column)
+
+
+    @staticmethod
+    def _parsePair(text: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        source, separator, target = text.partition(":")
+        if not separator:
+            raise argparse.ArgumentTypeError(f"Ожидалась пара вида 'строка,столбец:строка,столбец': {text}")
+        return (BatchSolver._parseCell(source), BatchSolver._parseCell(target))
+
+
+    @staticmethod
+    def _readCell(entry: Dict[str, Any], key: str) -> Optional[Tuple[int, int]]:
+        if key not in entry:
+            return None
+
+        cell = entry[key]
+        if not (isinstance(cell, list) and len(cell) == 2 and all(type(i) is int for i in cell)):
+            raise ValueError(f"Поле {key} должно быть парой целых чисел [строка, столбец]")
+        return (cell[0], cell[1])
+
+
+    @staticmethod
+    def _readTaskLine(line: str) -> Tuple[str, List[Tuple[str, Optional[Tuple[int, int]], Optional[Tuple[int, int]]]]]:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            raise ValueError("Строка не является объектом JSON")
+
+        if not isinstance(entry, dict):
+            raise ValueError("Строка не является объектом JSON")
+        if not isinstance(entry.get("file"), str):
+            raise ValueError("Не указан файл лабиринта (поле file)")
+
+        source = BatchSolver._readCell(entry, "source")
+        target = BatchSolver._readCell(entry, "target")
+        names = entry.get("algorithm", list(BatchSolver.algorithms.keys()))
+        names = [names] if isinstance(names, str) else names
+        if not (isinstance(names, list) and names and all(isinstance(name, str) for name in names)):
+            raise ValueError("Поле algorithm должно быть именем алгоритма или списком имён")
+
+        return (entry["file"], [(name, source, target) for name in names])
+
+
+    @staticmethod
+    def _readTaskFile(stream: TextIO) -> Iterator[BatchTask]:
+        # One JSON object per line: {"file": ..., "source": [r, c], "target": [r, c], "algorithm": ...}.
+        # Consecutive lines for the same file are grouped so the maze is loaded only once.
+        # A malformed line is reported as an error record and the following lines are still solved.
+        current: Optional[BatchTask] = None
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+
+            try:
+                file, queries = BatchSolver._readTaskLine(line)
+            except ValueError as e:
+                if current is not None:
+                    yield current
+                    current = None
+                yield BatchTask(None, [], str(e), number)
+                continue
+
+            if current is not None and current.file == file:
+                current.queries.extend(queries)
+            else:
+                if current is not None:
+                    yield current
+                current = BatchTask(file, queries)
+
+        if current is not None:
+            yield current
+
+
+    @staticmethod
+    def createParser() -> argparse.ArgumentParser:
+        parser = argparse.ArgumentParser(
+            description="Поиск путей в лабиринтах без графического интерфейса. "
+                        "Результаты выводятся построчно в формате JSON.")
+        parser.add_argument("files", nargs="*", metavar="FILE",
+            help="файлы лабиринтов в текстовом или двоичном формате GridFileLoader")
+        parser.add_argument("-p", "--pair", action="append", type=BatchSolver._parsePair, default=[],
+            metavar="R,C:R,C", help="пара старт:цель, применяется к каждому файлу (по умолчанию углы сетки)")
+        parser.add_argument("-a", "--algorithm", action="append", choices=BatchSolver.algorithms.keys(),
+            help="алгоритм поиска, можно указать несколько раз (по умолчанию все); "
+                 "hpa находит приближённо кратчайший путь, остальные — точно кратчайший")
+        parser.add_argument("-t", "--tasks", type=argparse.FileType("r", encoding="utf-8"),
+            help="файл заданий JSON Lines с полями file, source, target, algorithm ('-' для stdin)")
+        parser.add_argument("-j", "--jobs", type=int, default=None,
+            help="количество процессов (по умолчанию число ядер)")
+        parser.add_argument("-c", "--chunk-size", type=int, default=1,
+            help="количество файлов, передаваемых процессу за раз")
+        parser.add_argument("-m", "--cache-size", type=int, default=64,
+            help="объём кэша путей каждого процесса в МБ, 0 отключает кэш (по умолчанию 64)")
+        parser.add_argument("-o", "--output", type=argparse.FileType("w", encoding="utf-8"), default=sys.stdout,
+            help="файл для результатов (по умолчанию stdout)")
+        return parser
+
+
+    @staticmethod
+    def main(argv: Optional[List[str]] = None) -> int:
+        parser = BatchSolver.createParser()
+        arguments = parser.parse_args(argv)
+
+        if not arguments.files and arguments.tasks is None:
+            parser.error("не указаны файлы лабиринтов или файл заданий")
+
+        names = arguments.algorithm or list(BatchSolver.algorithms.keys())
+        pairs = arguments.pair or [(None, None)]
+
+        def tasks() -> Iterator[BatchTask]:
+            for file in arguments.files:
+                yield BatchTask(file, [(name, source, target) for source, target in pairs for name in names])
+
+            if arguments.tasks is not None:
+                yield from BatchSolver._readTaskFile(arguments.tasks)
+
+        solver = BatchSolver(arguments.jobs, arguments.chunk_size, arguments.cache_size << 20)
+        solver.run(tasks(), arguments.output)
+        return 0
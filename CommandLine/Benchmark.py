@@ -0,0 +1,293 @@
+from Algorithms.PathFindingAlgorithm import BreadthFirstSearchAlgorithm, PathFindingAlgorithm
+from CommandLine.BatchSolver import BatchSolver
+from FileSystem.GridFileLoader import GridFileLoader
+from FileSystem.GridFileSaver import GridFileSaver
+from FileSystem.TiledGridFile import TiledGridLoader, TiledGridSaver
+from Grid.GridMap import GridMatrix
+from Grid.MazeGeneratingAlgorithm import DfsMazeGenerator, EllerMazeGenerator, KruskalMazeGenerator, MazeGeneratingAlgorithm, WilsonMazeGenerator
+
+from random import Random
+from typing import *
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+class BenchmarkCase():
+    def __init__(self, corpus: str, size: int, grid: GridMatrix):
+        self.corpus = corpus
+        self.size = size
+        self.grid = grid
+        # The corners `SolverGridWidget` starts with, always free.
+        self.source = (size - 1, size - 1)
+        self.target = (0, 0)
+        grid.tryResetCell(self.source)
+        grid.tryResetCell(self.target)
+
+
+class Benchmark():
+
+    algorithms: Dict[str, PathFindingAlgorithm] = BatchSolver.algorithms
+
+    generators: Dict[str, MazeGeneratingAlgorithm] = {
+        "dfs": DfsMazeGenerator,
+        "kruskal": KruskalMazeGenerator,
+        "wilson": WilsonMazeGenerator,
+        "eller": EllerMazeGenerator
+    }
+
+    formats: List[str] = ["text", "binary", "tiled"]
+
+    # Every search is checked against the length of the shortest path found by this one.
+    reference: PathFindingAlgorithm = BreadthFirstSearchAlgorithm
+
+
+    def __init__(self, sizes: List[int], densities: List[float], seed: int = 0, repeat: int = 5,
+                 minTime: float = 0.2, memory: bool = True):
+        self.sizes = sizes
+        self.densities = densities
+        self.seed = seed
+        self.repeat = repeat
+        self.minTime = minTime
+        self.memory = memory
+
+
+    def random(self, *key: Any) -> Random:
+        # Every corpus gets its own generator, so it stays the same whichever others are built.
+        return Random("-".join(str(i) for i in (self.seed,) + key))
+
+
+    @staticmethod
+    def obstacleGrid(size: int, density: float, random: Random) -> GridMatrix:
+        # Each random byte becomes a wall when it is below `density * 256`.
+        threshold = round(density * 256)
+        walls = bytes(1 if i < threshold else 0 for i in range(256))
+        return GridMatrix.fromBuffer(size, size, bytearray(random.randbytes(size * size).translate(walls)), copy=False)
+
+
+    @staticmethod
+    def corridorGrid(size: int) -> GridMatrix:
+        # A single corridor winding through every row, the longest path a grid of this size can have.
+        cells = bytearray()
+        for row in range(size):
+            if row % 4 == 1:
+                cells += b'\x01' * (size - 1) + b'\x00'
+            elif row % 4 == 3:
+                cells += b'\x00' + b'\x01' * (size - 1)
+            else:
+                cells += bytes(size)
+        return GridMatrix.fromBuffer(size, size, cells, copy=False)
+
+
+    def corpora(self) -> Iterator[BenchmarkCase]:
+        for size in self.sizes:
+            yield BenchmarkCase("open", size, GridMatrix(size, size))
+            for density in self.densities:
+                yield BenchmarkCase(f"random-{density:g}", size,
+                    Benchmark.obstacleGrid(size, density, self.random("random", density, size)))
+            yield BenchmarkCase("dfs", size, DfsMazeGenerator.generate(size, size, seed=self.random("dfs", size)))
+            yield BenchmarkCase("corridor", size, Benchmark.corridorGrid(size))
+
+
+    def measure(self, work: Callable[[], Any]) -> Dict[str, Any]:
+        # Like `timeit`, short work is repeated up to `repeat` times and the fastest run is kept.
+        # Peak memory is taken in one more run, as tracing allocations slows the work down.
+        times = []
+        while not times or (sum(times) < self.minTime and len(times) < self.repeat):
+            start = time.perf_counter()
+            result = work()
+            times.append(time.perf_counter() - start)
+
+        record = {"time": min(times), "firstTime": times[0], "runs": len(times), "result": result}
+        if self.memory:
+            tracemalloc.start()
+            try:
+                work()
+                record["peakMemory"] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        return record
+
+
+    def searches(self, names: List[str]) -> Iterator[Dict[str, Any]]:
+        for case in self.corpora():
+            shortest = Benchmark.reference.search(case.grid, case.source, case.target).path
+            for name in names:
+                algorithm = Benchmark.algorithms[name]
+                record = self.measure(lambda: algorithm.search(case.grid, case.source, case.target))
+                result = record.pop("result")
+
+                record.update({"kind": "search", "corpus": case.corpus, "size": case.size, "algorithm": name,
+                    "expanded": result.expanded,
+                    "length": None if result.path is None else len(result.path),
+                    "reference": None if shortest is None else len(shortest)})
+                record["optimal"] = record["length"] == record["reference"]
+                yield record
+
+
+    def generation(self, names: List[str]) -> Iterator[Dict[str, Any]]:
+        for size in self.sizes:
+            for name in names:
+                generator = Benchmark.generators[name]
+                record = self.measure(lambda: generator.generate(size, size, seed=self.random(name, size)))
+                record.pop("result")
+                record.update({"kind": "generate", "size": size, "generator": name})
+                yield record
+
+
+    def fileIO(self, directory: str) -> Iterator[Dict[str, Any]]:
+        savers: Dict[str, Callable[[GridMatrix, str], Any]] = {
+            "text": lambda grid, file: GridFileSaver(grid, file, binary=False).save(),
+            "binary": lambda grid, file: GridFileSaver(grid, file, binary=True).save(),
+            "tiled": TiledGridSaver.save
+        }
+
+        def loadTiled(file: str) -> GridMatrix:
+            with TiledGridLoader(file) as loader:
+                return loader.load()
+
+        loaders: Dict[str, Callable[[str], GridMatrix]] = {
+            "text": lambda file: GridFileLoader(file).load(),
+            "binary": lambda file: GridFileLoader(file).load(),
+            "tiled": loadTiled
+        }
+
+        for size in self.sizes:
+            grid = DfsMazeGenerator.generate(size, size, seed=self.random("dfs", size))
+            for fileFormat in Benchmark.formats:
+                file = os.path.join(directory, f"{size}.{fileFormat}")
+                for operation, work in (("save", lambda: savers[fileFormat](grid, file)),
+                                        ("load", lambda: loaders[fileFormat](file))):
+                    record = self.measure(work)
+                    loaded = record.pop("result")
+                    record.update({"kind": operation, "size": size, "format": fileFormat, "bytes": os.path.getsize(file)})
+                    if operation == "load":
+                        record["correct"] = bytes(loaded.buffer) == bytes(grid.buffer)
+                    yield record
+
+
+    @staticmethod
+    def key(record: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(record.get(field) for field in ("kind", "corpus", "size", "algorithm", "generator", "format"))
+
+
+    @staticmethod
+    def describe(record: Dict[str, Any]) -> str:
+        name = " ".join(str(record[field]) for field in ("kind", "corpus", "algorithm", "generator", "format") if field in record)
+        line = f"{name} {record['size']}x{record['size']}: {record['time'] * 1000:.2f} мс"
+        if "expanded" in record:
+            line += f", раскрыто {record['expanded']}"
+        if record.get("optimal") is False:
+            line += f", путь {record['length']} вместо {record['reference']}"
+        if Benchmark.isWrong(record):
+            line += ", НЕВЕРНЫЙ РЕЗУЛЬТАТ"
+        if "peakMemory" in record:
+            line += f", память {record['peakMemory'] / (1 << 20):.1f} МБ"
+        return line
+
+
+    @staticmethod
+    def isWrong(record: Dict[str, Any]) -> bool:
+        # Longer paths are only reported, some searches trade optimality for speed;
+        # a path that is missing or should not exist, or a file read back differently, is an error.
+        if record.get("correct") is False:
+            return True
+        return "reference" in record and (record["length"] is None) != (record["reference"] is None)
+
+
+    @staticmethod
+    def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]]) -> Iterator[str]:
+        # Time ratios against an earlier run; below 1 is faster.
+        previous = {Benchmark.key(record): record for record in baseline}
+        for record in results:
+            old = previous.get(Benchmark.key(record))
+            if old is not None and old["time"] > 0:
+                yield f"{Benchmark.describe(record)} ({record['time'] / old['time']:.2f}x)"
+
+
+    @staticmethod
+    def createParser() -> argparse.ArgumentParser:
+        parser = argparse.ArgumentParser(
+            description="Замеры алгоритмов поиска, генерации лабиринтов и работы с файлами "
+                        "на воспроизводимых наборах сеток. Результаты сохраняются в JSON.")
+        parser.add_argument("-s", "--sizes", type=int, nargs="+", default=[10, 100, 500, 2000],
+            help="стороны квадратных сеток (по умолчанию 10 100 500 2000)")
+        parser.add_argument("-d", "--densities", type=float, nargs="+", default=[0.1, 0.25, 0.4],
+            help="доли стен в случайных сетках (по умолчанию 0.1 0.25 0.4)")
+        parser.add_argument("-a", "--algorithm", action="append", choices=Benchmark.algorithms.keys(),
+            help="алгоритм поиска, можно указать несколько раз (по умолчанию все)")
+        parser.add_argument("-g", "--generator", action="append", choices=Benchmark.generators.keys(),
+            help="генератор лабиринтов, можно указать несколько раз (по умолчанию все)")
+        parser.add_argument("--only", choices=["search", "generate", "io"], action="append",
+            help="запустить только эти замеры (по умолчанию все)")
+        parser.add_argument("--seed", type=int, default=0,
+            help="зерно генерации наборов сеток (по умолчанию 0)")
+        parser.add_argument("-r", "--repeat", type=int, default=5,
+            help="наибольшее число повторов быстрых замеров, учитывается лучший (по умолчанию 5)")
+        parser.add_argument("--no-memory", action="store_true",
+            help="не измерять пиковую память (каждый замер без неё в два раза быстрее)")
+        parser.add_argument("-b", "--baseline", type=argparse.FileType("r", encoding="utf-8"),
+            help="результаты прошлого запуска для сравнения времени")
+        parser.add_argument("-o", "--output", default="benchmark.json",
+            help="файл для результатов (по умолчанию benchmark.json)")
+        return parser
+
+
+    @staticmethod
+    def main(argv: Optional[List[str]] = None) -> int:
+        parser = Benchmark.createParser()
+        arguments = parser.parse_args(argv)
+
+        # The baseline is read before anything is written, it may well be the output file of this run.
+        baseline: Optional[List[Dict[str, Any]]] = None
+        if arguments.baseline is not None:
+            try:
+                with arguments.baseline:
+                    baseline = json.load(arguments.baseline)["results"]
+            except (ValueError, KeyError, TypeError):
+                parser.error(f"файл {arguments.baseline.name} не содержит результатов замеров")
+
+        benchmark = Benchmark(arguments.sizes, arguments.densities, arguments.seed, arguments.repeat,
+            memory=not arguments.no_memory)
+        only = arguments.only or ["search", "generate", "io"]
+
+        results: List[Dict[str, Any]] = []
+        with tempfile.TemporaryDirectory() as directory:
+            runs = []
+            if "search" in only:
+                runs.append(benchmark.searches(arguments.algorithm or list(Benchmark.algorithms.keys())))
+            if "generate" in only:
+                runs.append(benchmark.generation(arguments.generator or list(Benchmark.generators.keys())))
+            if "io" in only:
+                runs.append(benchmark.fileIO(directory))
+
+            for run in runs:
+                for record in run:
+                    print(Benchmark.describe(record), flush=True)
+                    results.append(record)
+
+        with open(arguments.output, "w", encoding="utf-8") as output:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "seed": arguments.seed,
+                "results": results
+            }, output, ensure_ascii=False, indent=1)
+
+        if baseline is not None:
+            print("Сравнение с прошлым запуском:")
+            for line in Benchmark.compare(results, baseline):
+                print(f"  {line}")
+
+        return 1 if any(Benchmark.isWrong(record) for record in results) else 0
+
+
+if __name__ == '__main__':
+
+    sys.exit(Benchmark.main())
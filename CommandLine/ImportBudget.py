@@ -0,0 +1,117 @@
+from typing import *
+import argparse
+import os
+import subprocess
+import sys
+
+
+class ImportBudget():
+    # Modules a headless worker needs: grid, generators, solvers and file I/O.
+    coreModules: List[str] = [
+        "Grid.GridMap",
+        "Grid.MazeGeneratingAlgorithm",
+        "Algorithms.PathFindingAlgorithm",
+        "FileSystem.GridFileLoader",
+        "FileSystem.GridFileSaver",
+        "FileSystem.BinaryGridFormat",
+        "FileSystem.TiledGridFile",
+        "Algorithms.HierarchicalPathFinding",
+        "Algorithms.PathCache",
+        "Algorithms.IncrementalPathFinding",
+    ]
+
+    # GUI toolkits that must never be pulled in by the core modules.
+    forbiddenModules: List[str] = ["PyQt5", "tkinter", "_tkinter"]
+
+    _probe = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "{imports}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(elapsed)\n"
+        "print(' '.join(m for m in {forbidden!r} if m in sys.modules))\n"
+    )
+
+
+    def __init__(self, modules: Optional[List[str]] = None, budget: float = 0.05, runs: int = 5, warm: bool = False):
+        self.modules = modules or ImportBudget.coreModules
+        self.budget = budget
+        self.runs = runs
+        # Only on request: measures with the bytecode cache allowed and refreshed by an untimed run first.
+        self.warm = warm
+
+
+    def _environment(self) -> Optional[Dict[str, str]]:
+        if not self.warm:
+            return None
+        environment = dict(os.environ)
+        environment.pop("PYTHONDONTWRITEBYTECODE", None)
+        return environment
+
+
+    def _measureOnce(self) -> Tuple[float, List[str]]:
+        # Every run uses a fresh interpreter, the way a spawned worker process would.
+        code = ImportBudget._probe.format(
+            imports="\n".join(f"import {module}" for module in self.modules),
+            forbidden=ImportBudget.forbiddenModules)
+        output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True,
+            env=self._environment()).stdout
+        elapsed, forbidden = output.split("\n")[:2]
+        return (float(elapsed), forbidden.split())
+
+
+    def measure(self) -> Tuple[float, List[str]]:
+        # The fastest run is the least disturbed by the rest of the system.
+        if self.warm:
+            self._measureOnce()
+        results = [self._measureOnce() for _ in range(self.runs)]
+        return min(results, key=lambda result: result[0])
+
+
+    def slowestModules(self, count: int = 10) -> List[Tuple[str, int]]:
+        code = "\n".join(f"import {module}" for module in self.modules)
+        output = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+            check=True, capture_output=True, text=True, env=self._environment()).stderr
+
+        # Lines look like "import time:       641 |      11910 |   multiprocessing.reduction".
+        timings = []
+        for line in output.splitlines():
+            own, _, name = line[len("import time:"):].split("|")
+            if own.strip().isdigit():
+                timings.append((name.strip(), int(own)))
+
+        return sorted(timings, key=lambda timing: timing[1], reverse=True)[:count]
+
+
+    @staticmethod
+    def main(argv: Optional[List[str]] = None) -> int:
+        parser = argparse.ArgumentParser(
+            description="Проверка времени импорта ядра (без PyQt5 и tkinter).")
+        parser.add_argument("-b", "--budget", type=float, default=0.05,
+            help="допустимое время импорта в секундах (по умолчанию 0.05)")
+        parser.add_argument("-r", "--runs", type=int, default=5,
+            help="количество замеров, учитывается лучший (по умолчанию 5)")
+        parser.add_argument("--warm", action="store_true",
+            help="разрешить кэш байт-кода и прогреть его перед замерами (по умолчанию окружение не меняется)")
+        arguments = parser.parse_args(argv)
+
+        check = ImportBudget(budget=arguments.budget, runs=arguments.runs, warm=arguments.warm)
+        elapsed, forbidden = check.measure()
+
+        mode = ", с прогретым кэшем байт-кода" if check.warm else ""
+        print(f"Время импорта ядра: {elapsed * 1000:.1f} мс (бюджет {check.budget * 1000:.1f} мс{mode})")
+
+        if forbidden:
+            print(f"Ядро импортирует графические модули: {', '.join(forbidden)}")
+
+        if elapsed > check.budget:
+            print("Самые медленные модули (собственное время, мкс):")
+            for name, own in check.slowestModules():
+                print(f"  {own:>8} {name}")
+
+        return 1 if forbidden or elapsed > check.budget else 0
+
+
+if __name__ == '__main__':
+
+    sys.exit(ImportBudget.main())
@@ -0,0 +1,100 @@
+from FileSystem.GridFileException import *
+from Grid.GridMap import GridMatrix
+
+from typing import *
+import mmap
+import struct
+
+
+class BinaryGridFormat():
+    # A 16-byte header: magic, format version, flags, rows and columns, all little-endian.
+    # The body follows it with one bit per cell: the cells in row-major order are cut into 8 planes
+    # of `ceil(cells / 8)` cells, and bit `k` of body byte `j` is cell `j` of plane `k`.
+    # With `flagUnpacked` set the body is one byte per cell instead.
+    magic: bytes = b'LBRN'
+    version: int = 1
+    flagUnpacked: int = 1
+    header: struct.Struct = struct.Struct('<4sHHII')
+
+    # `_bits[k]` maps a byte to its bit `k`.
+    _bits: Tuple[bytes, ...] = tuple(bytes(i >> k & 1 for i in range(256)) for k in range(8))
+
+
+    @staticmethod
+    def isBinary(prefix: bytes) -> bool:
+        return prefix[:len(BinaryGridFormat.magic)] == BinaryGridFormat.magic
+
+
+    @staticmethod
+    def pack(cells: Union[bytes, bytearray, memoryview]) -> bytes:
+        # The cells are 0 or 1, so shifting a plane by less than 8 bits keeps every cell
+        # inside its own byte and the shifted planes can be combined as big integers.
+        cells = bytes(cells)
+        size = -(-len(cells) // 8)
+        packed = 0
+        for k in range(8):
+            packed |= int.from_bytes(cells[k * size:(k + 1) * size], 'little') << k
+        return packed.to_bytes(size, 'little')
+
+
+    @staticmethod
+    def unpack(packed: bytes, size: int) -> bytearray:
+        # Planes are contiguous, so each one is a single translation of the body.
+        cells = bytearray(size)
+        planeSize = len(packed)
+        for k in range(8):
+            cells[k * planeSize:(k + 1) * planeSize] = packed.translate(BinaryGridFormat._bits[k])[:max(size - k * planeSize, 0)]
+        return cells
+
+
+    @staticmethod
+    def read(file: str) -> GridMatrix:
+        try:
+            with open(file, 'rb') as stream:
+                # The body is read straight out of the page cache, without going through Python file buffers.
+                with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    return BinaryGridFormat._parse(view, file)
+        except (OSError, ValueError):
+            raise GridFileException(f"Файл не может быть открыт!\nФайл: {file}")
+
+
+    @staticmethod
+    def _parse(view: mmap.mmap, file: str) -> GridMatrix:
+        if len(view) < BinaryGridFormat.header.size:
+            raise FileFormatException(f"Файл: {file}")
+
+        magic, version, flags, rows, columns = BinaryGridFormat.header.unpack_from(view)
+        if magic != BinaryGridFormat.magic or version > BinaryGridFormat.version:
+            raise FileFormatException(f"Неподдерживаемая версия формата: {version}\nФайл: {file}")
+
+        if rows < 10 or columns < 10:
+            raise FileFormatException(f"Неверные размеры матрицы!\nФайл: {file}")
+
+        size = rows * columns
+        start = BinaryGridFormat.header.size
+        length = size if flags & BinaryGridFormat.flagUnpacked else -(-size // 8)
+        if len(view) - start < length:
+            raise FileFormatException(f"Файл обрезан!\nФайл: {file}")
+
+        if flags & BinaryGridFormat.flagUnpacked:
+            with memoryview(view) as body:
+                cells = bytearray(body[start:start + size])
+            if cells.translate(None, b'\x00\x01'):
+                raise FileFormatException(f"Ячейки должны быть 0 или 1!\nФайл: {file}")
+        else:
+            cells = BinaryGridFormat.unpack(view[start:start + length], size)
+
+        return GridMatrix.fromBuffer(rows, columns, cells, copy=False)
+
+
+    @staticmethod
+    def write(grid: GridMatrix, file: str, packed: bool = True) -> None:
+        flags = 0 if packed else BinaryGridFormat.flagUnpacked
+        body = BinaryGridFormat.pack(grid.buffer) if packed else grid.buffer
+        try:
+            with open(file, 'wb') as stream:
+                stream.write(BinaryGridFormat.header.pack(
+                    BinaryGridFormat.magic, BinaryGridFormat.version, flags, grid.rows, grid.columns))
+                stream.write(body)
+        except OSError:
+            raise GridFileException(f"Файл не может быть открыт!\nФайл: {file}")
@@ -1,39 +1,139 @@
-from tkinter import Grid
 from FileSystem.GridFileException import *
 from Grid.GridMap import GridMatrix
 
+from typing import Optional, Tuple
+
 
 class GridFileLoader():
-    def __init__(self, file: str):
+    _digits = bytes.maketrans(b'01', b'\x00\x01')
+    # The magic bytes of `BinaryGridFormat` and `TiledGridFormat`, whose modules are only
+    # imported for files in their format, so loading text mazes does not pay for them.
+    _binaryMagic: bytes = b'LBRN'
+    _tiledMagic: bytes = b'LBRT'
+
+    def __init__(self, file: str, region: Optional[Tuple[int, int, int, int]] = None):
+        # With `region`, `(top, left, rows, columns)` clipped to the maze, only that part is loaded;
+        # tiled files then read just the tiles it covers, so they may be larger than memory.
         self.__file = file
+        self.__region = region
+        # The size of the whole maze in the file and whether it is tiled, known once it is loaded
+        # or `readSize` has been called.
+        self.size: Optional[Tuple[int, int]] = None
+        self.tiled: Optional[bool] = None
+
+    def readSize(self) -> Tuple[int, int]:
+        # Reads only the header, so the region to load can be chosen before the maze is loaded.
+        try:
+            with open(self.__file, 'rb') as file:
+                prefix = file.read(len(GridFileLoader._binaryMagic))
+                if prefix == GridFileLoader._binaryMagic:
+                    from FileSystem.BinaryGridFormat import BinaryGridFormat
+                    header = prefix + file.read(BinaryGridFormat.header.size - len(prefix))
+                elif prefix != GridFileLoader._tiledMagic:
+                    header = prefix + file.readline()
+        except OSError:
+            raise GridFileException(f"Файл не может быть открыт!\nФайл: {self.__file}")
+
+        self.tiled = prefix == GridFileLoader._tiledMagic
+        if self.tiled:
+            from FileSystem.TiledGridFile import TiledGridLoader
+            with TiledGridLoader(self.__file) as loader:
+                self.size = (loader.rows, loader.columns)
+        elif prefix == GridFileLoader._binaryMagic:
+            if len(header) < BinaryGridFormat.header.size:
+                raise FileFormatException(f"Файл: {self.__file}")
+            self.size = BinaryGridFormat.header.unpack(header)[3:]
+        else:
+            try:
+                rows, columns = [int(i) for i in header.split()]
+            except ValueError:
+                raise FileFormatException(f"Файл: {self.__file}")
+            self.size = (rows, columns)
+
+        return self.size
 
     def load(self) -> GridMatrix:
+        # Binary files are told apart from text ones by their magic bytes.
         try:
-            file = open(self.__file, 'r')
+            with open(self.__file, 'rb') as file:
+                prefix = file.read(len(GridFileLoader._binaryMagic))
         except OSError:
             raise GridFileException(f"Файл не может быть открыт!\nФайл: {self.__file}")
+
+        self.tiled = prefix == GridFileLoader._tiledMagic
+        if self.tiled:
+            from FileSystem.TiledGridFile import TiledGridLoader
+            with TiledGridLoader(self.__file) as loader:
+                self.size = (loader.rows, loader.columns)
+                return loader.load(*self.__clipRegion())
+
+        if prefix == GridFileLoader._binaryMagic:
+            from FileSystem.BinaryGridFormat import BinaryGridFormat
+            grid = BinaryGridFormat.read(self.__file)
         else:
-            lines = file.readlines()
+            grid = self.__loadText()
 
-            if len(lines) < 2:
-                raise FileFormatException(f"Файл: {self.__file}")
+        self.size = (grid.rows, grid.columns)
+        if self.__region is None:
+            return grid
 
-            try:
-                rows, columns = [int(i) for i in lines[0].split()]
+        (top, left, rows, columns) = self.__clipRegion()
+        if (rows, columns) == self.size:
+            return grid
+        cells = bytearray()
+        for i in range(top, top + rows):
+            cells += grid.buffer[i * grid.columns + left:i * grid.columns + left + columns]
+        return GridMatrix.fromBuffer(rows, columns, cells, copy=False)
 
-                result = GridMatrix(1, 1)
-                
-                if not result.tryResize(rows, columns):
-                    raise FileFormatException(f"Неверные размеры матрицы!\nФайл: {self.__file}")
+    def __clipRegion(self) -> Tuple[int, int, int, int]:
+        (mazeRows, mazeColumns) = self.size
+        (top, left, rows, columns) = self.__region or (0, 0, mazeRows, mazeColumns)
+        if not (0 <= top < mazeRows and 0 <= left < mazeColumns) or rows < 1 or columns < 1:
+            raise GridFileException(f"Область {rows}x{columns} в {(top, left)} вне лабиринта {mazeRows}x{mazeColumns}!\nФайл: {self.__file}")
+        return (top, left, min(rows, mazeRows - top), min(columns, mazeColumns - left))
 
-                for i in range(rows):
-                    line = lines[1:][i].split()
-                    for j in range(columns):
-                        if int(line[j]) == 1:
-                            result.trySetCell((i, j))
-                            
-                return result
+    def __loadText(self) -> GridMatrix:
+        # The file is read line by line, only the cells are kept.
+        try:
+            file = open(self.__file, 'rb')
+        except OSError:
+            raise GridFileException(f"Файл не может быть открыт!\nФайл: {self.__file}")
 
+        with file:
+            try:
+                rows, columns = [int(i) for i in file.readline().split()]
             except ValueError:
                 raise FileFormatException(f"Файл: {self.__file}")
-                
+
+            if rows < 10 or columns < 10:
+                raise FileFormatException(f"Неверные размеры матрицы!\nФайл: {self.__file}")
+
+            cells = bytearray()
+            for line in file:
+                if len(cells) == rows * columns:
+                    break
+                cells += GridFileLoader.__parseRow(line, columns, self.__file)
+
+        if len(cells) < rows * columns:
+            raise FileFormatException(f"Строк меньше, чем {rows}!\nФайл: {self.__file}")
+
+        return GridMatrix.fromBuffer(rows, columns, cells, copy=False)
+
+    @staticmethod
+    def __parseRow(line: bytes, columns: int, file: str) -> bytes:
+        # Rows written by `GridFileSaver` are single digits each followed by a space: the digits are
+        # every other byte and become cells with one translation. Anything else goes through `int`.
+        line = line.rstrip(b'\r\n')
+        digits = line[0::2]
+        separators = line[1::2]
+        if len(digits) == columns and separators.count(b' ') == len(separators) and not digits.translate(None, b'01'):
+            return digits.translate(GridFileLoader._digits)
+
+        values = line.split()
+        if len(values) < columns:
+            raise FileFormatException(f"В строке меньше {columns} значений!\nФайл: {file}")
+
+        try:
+            return bytes(1 if int(i) == 1 else 0 for i in values[:columns])
+        except ValueError:
+            raise FileFormatException(f"Файл: {file}")
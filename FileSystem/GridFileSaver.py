@@ -1,22 +1,52 @@
-from tkinter import Grid
 from FileSystem.GridFileException import *
 from Grid.GridMap import GridMatrix
 
+from typing import Iterable, Optional, Union
+
 
 class GridFileSaver():
-    def __init__(self, grid: GridMatrix, file: str):
+    # Files with this extension are written in the binary format, unless `binary` says otherwise.
+    binaryExtension: str = ".grid"
+    bufferSize: int = 1 << 20
+    _digits = bytes.maketrans(b'\x00\x01', b'01')
+
+    def __init__(self, grid: GridMatrix, file: str, binary: Optional[bool] = None):
         self.__file = file
         self.__grid = grid
+        self.__binary = file.lower().endswith(GridFileSaver.binaryExtension) if binary is None else binary
 
     def save(self) -> GridMatrix:
+        if self.__binary:
+            from FileSystem.BinaryGridFormat import BinaryGridFormat
+            BinaryGridFormat.write(self.__grid, self.__file)
+            return self.__grid
+
+        GridFileSaver.saveRows((self.__grid.getRow(i) for i in range(self.__grid.rows)),
+            self.__file, self.__grid.rows, self.__grid.columns)
+        return self.__grid
+
+    @staticmethod
+    def saveRows(cells: Iterable[Union[bytes, bytearray, memoryview]], file: str, rows: int, columns: int) -> None:
+        # Writes a text maze from its rows as they come, e.g. from a generator, without the whole grid in memory.
+        # Every row becomes its digits with a space after each, written out in blocks of about `bufferSize` bytes.
+        line = bytearray(b' ' * (2 * columns) + b'\n')
+        written = 0
         try:
-            file = open(self.__file, 'w')
+            with open(file, 'wb') as stream:
+                stream.write(f"{rows} {columns}\n".encode())
+                block = bytearray()
+                for row in cells:
+                    if len(row) != columns or written == rows:
+                        raise GridFileException(f"Строки не соответствуют лабиринту {rows}x{columns}!\nФайл: {file}")
+                    line[0:2 * columns:2] = bytes(row).translate(GridFileSaver._digits)
+                    block += line
+                    written += 1
+                    if len(block) >= GridFileSaver.bufferSize:
+                        stream.write(block)
+                        block.clear()
+                stream.write(block)
         except OSError:
-            raise GridFileException(f"Файл не может быть открыт!\nФайл: {self.__file}")
-        else:
-            file.write(f"{self.__grid.rows} {self.__grid.columns}\n")
-            for i in range(self.__grid.rows):
-                for j in range(self.__grid.columns):
-                    file.write("1 " if self.__grid.getCell((i, j)) else "0 ")
-                file.write("\n")
-                
+            raise GridFileException(f"Файл не может быть открыт!\nФайл: {file}")
+
+        if written != rows:
+            raise GridFileException(f"Записано {written} строк из {rows}!\nФайл: {file}")
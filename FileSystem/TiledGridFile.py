@@ -0,0 +1,276 @@
+from FileSystem.GridFileException import *
+from Grid.GridMap import GridMatrix
+
+from array import array
+from collections import OrderedDict
+from typing import *
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+
+class TiledGridFormat():
+    # A 28-byte header: magic, format version, flags, rows, columns, tile size and the offset of the
+    # tile index, all little-endian. The tiles follow it row by row, each one the zlib-compressed
+    # bytes of its cells (one per cell, row-major; tiles on the right and bottom edges are smaller).
+    # The index lists the offset of every tile and, last, the offset of the index itself.
+    magic: bytes = b'LBRT'
+    version: int = 1
+    header: struct.Struct = struct.Struct('<4sHHIIIQ')
+
+
+    @staticmethod
+    def tileCount(size: int, tileSize: int) -> int:
+        return -(-size // tileSize)
+
+
+class TiledGridSaver():
+    # Writes rows as they come, so a maze larger than memory can be written while it is generated:
+    # only one band of `tileSize` rows is kept.
+
+    def __init__(self, file: str, rows: int, columns: int, tileSize: int = 256, level: int = 6):
+        if rows < 1 or columns < 1 or tileSize < 1:
+            raise ValueError(f"Invalid tiled grid {rows}x{columns} with tiles of {tileSize}")
+
+        self.rows = rows
+        self.columns = columns
+        self.tileSize = tileSize
+        self.level = level
+        self.__file = file
+        self.__written = 0
+        self.__band: List[bytes] = []
+        self.__offsets = array('Q')
+        self.__finished = False
+
+        try:
+            self.__stream = open(file, 'wb')
+            self.__stream.write(bytes(TiledGridFormat.header.size))
+        except OSError:
+            raise GridFileException(f"Файл не может быть открыт!\nФайл: {file}")
+
+
+    def __enter__(self) -> "TiledGridSaver":
+        return self
+
+
+    def __exit__(self, exceptionType: Optional[type], *exception) -> None:
+        # When the rows could not all be written, the error that stopped them is the one to see.
+        if exceptionType is None:
+            self.close()
+        else:
+            self.abort()
+
+
+    def writeRow(self, row: Union[bytes, bytearray, memoryview]) -> None:
+        if len(row) != self.columns:
+            raise ValueError(f"Row of {len(row)} cells in a grid of {self.columns} columns")
+        if self.__written + len(self.__band) == self.rows:
+            raise ValueError(f"All {self.rows} rows are already written")
+
+        self.__band.append(bytes(row))
+        if len(self.__band) == self.tileSize:
+            self.__flushBand()
+
+
+    def writeRows(self, rows: Iterable[Union[bytes, bytearray, memoryview]]) -> None:
+        for row in rows:
+            self.writeRow(row)
+
+
+    def __flushBand(self) -> None:
+        try:
+            for left in range(0, self.columns, self.tileSize):
+                self.__offsets.append(self.__stream.tell())
+                tile = b''.join(row[left:left + self.tileSize] for row in self.__band)
+                self.__stream.write(zlib.compress(tile, self.level))
+        except OSError:
+            raise GridFileException(f"Ошибка записи!\nФайл: {self.__file}")
+
+        self.__written += len(self.__band)
+        self.__band = []
+
+
+    def abort(self) -> None:
+        # Drops an unfinished file, it has no header and no index.
+        if self.__finished:
+            return
+
+        try:
+            self.__stream.close()
+        except OSError:
+            pass
+        try:
+            os.remove(self.__file)
+        except OSError:
+            pass
+
+
+    def close(self) -> None:
+        if self.__stream.closed:
+            return
+
+        try:
+            self.__finish()
+        except BaseException:
+            self.abort()
+            raise
+
+
+    def __finish(self) -> None:
+        try:
+            if self.__band:
+                self.__flushBand()
+            if self.__written != self.rows:
+                raise GridFileException(f"Записано {self.__written} строк из {self.rows}!\nФайл: {self.__file}")
+
+            indexOffset = self.__stream.tell()
+            self.__offsets.append(indexOffset)
+            if sys.byteorder != 'little':
+                self.__offsets.byteswap()
+            self.__stream.write(self.__offsets.tobytes())
+
+            self.__stream.seek(0)
+            self.__stream.write(TiledGridFormat.header.pack(
+                TiledGridFormat.magic, TiledGridFormat.version, 0, self.rows, self.columns, self.tileSize, indexOffset))
+            self.__stream.close()
+            self.__finished = True
+        except OSError:
+            raise GridFileException(f"Ошибка записи!\nФайл: {self.__file}")
+
+
+    @staticmethod
+    def save(grid: GridMatrix, file: str, tileSize: int = 256) -> None:
+        with TiledGridSaver(file, grid.rows, grid.columns, tileSize) as saver:
+            for row in range(grid.rows):
+                saver.writeRow(grid.getRow(row))
+
+
+class TiledGridLoader():
+    # Random access to a tiled maze: only the tiles a request covers are read and decompressed,
+    # the last `cacheTiles` decoded ones are kept.
+
+    def __init__(self, file: str, cacheTiles: int = 256):
+        self.__file = file
+        self.cacheTiles = cacheTiles
+        self.hits = 0
+        self.misses = 0
+        self.__tiles: "OrderedDict[Tuple[int, int], bytes]" = OrderedDict()
+
+        try:
+            with open(file, 'rb') as stream:
+                self.__view = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            raise GridFileException(f"Файл не может быть открыт!\nФайл: {file}")
+
+        try:
+            self.__readIndex()
+        except FileFormatException:
+            self.close()
+            raise
+
+
+    def __readIndex(self) -> None:
+        if len(self.__view) < TiledGridFormat.header.size:
+            raise FileFormatException(f"Файл: {self.__file}")
+
+        magic, version, flags, self.rows, self.columns, self.tileSize, indexOffset = \
+            TiledGridFormat.header.unpack_from(self.__view)
+        if magic != TiledGridFormat.magic or version > TiledGridFormat.version:
+            raise FileFormatException(f"Неподдерживаемая версия формата: {version}\nФайл: {self.__file}")
+
+        if min(self.rows, self.columns, self.tileSize) < 1:
+            raise FileFormatException(f"Неверные размеры матрицы!\nФайл: {self.__file}")
+
+        self.tileRows = TiledGridFormat.tileCount(self.rows, self.tileSize)
+        self.tileColumns = TiledGridFormat.tileCount(self.columns, self.tileSize)
+        count = self.tileRows * self.tileColumns + 1
+
+        index = self.__view[indexOffset:indexOffset + 8 * count]
+        if len(index) != 8 * count:
+            raise FileFormatException(f"Индекс плиток повреждён!\nФайл: {self.__file}")
+
+        self.__offsets = array('Q', index)
+        if sys.byteorder != 'little':
+            self.__offsets.byteswap()
+
+        if self.__offsets[-1] != indexOffset:
+            raise FileFormatException(f"Индекс плиток повреждён!\nФайл: {self.__file}")
+
+
+    def __enter__(self) -> "TiledGridLoader":
+        return self
+
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+
+    def close(self) -> None:
+        self.__tiles.clear()
+        self.__view.close()
+
+
+    def tileShape(self, tileRow: int, tileColumn: int) -> Tuple[int, int]:
+        return (min(self.tileSize, self.rows - tileRow * self.tileSize),
+                min(self.tileSize, self.columns - tileColumn * self.tileSize))
+
+
+    def tile(self, tileRow: int, tileColumn: int) -> bytes:
+        # The cells of a tile, one byte each in row-major order, see `tileShape` for its size.
+        key = (tileRow, tileColumn)
+        tile = self.__tiles.get(key)
+        if tile is not None:
+            self.__tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+        self.misses += 1
+        index = tileRow * self.tileColumns + tileColumn
+        try:
+            tile = zlib.decompress(self.__view[self.__offsets[index]:self.__offsets[index + 1]])
+        except zlib.error:
+            raise FileFormatException(f"Плитка {key} повреждена!\nФайл: {self.__file}")
+
+        rows, columns = self.tileShape(tileRow, tileColumn)
+        if len(tile) != rows * columns or tile.translate(None, b'\x00\x01'):
+            raise FileFormatException(f"Плитка {key} повреждена!\nФайл: {self.__file}")
+
+        self.__tiles[key] = tile
+        while len(self.__tiles) > self.cacheTiles:
+            self.__tiles.popitem(last=False)
+        return tile
+
+
+    def getCell(self, cell: Tuple[int, int]) -> bool:
+        (x, y) = cell
+        if not (0 <= x < self.rows and 0 <= y < self.columns):
+            return False
+
+        tile = self.tile(x // self.tileSize, y // self.tileSize)
+        return tile[(x % self.tileSize) * self.tileShape(x // self.tileSize, y // self.tileSize)[1] + y % self.tileSize] == 1
+
+
+    def load(self, top: int = 0, left: int = 0, rows: Optional[int] = None, columns: Optional[int] = None) -> GridMatrix:
+        # The cells of the given rectangle, by default the whole maze, as a grid of its own.
+        rows = self.rows - top if rows is None else rows
+        columns = self.columns - left if columns is None else columns
+        if top < 0 or left < 0 or rows < 1 or columns < 1 or top + rows > self.rows or left + columns > self.columns:
+            raise ValueError(f"Region {rows}x{columns} at {(top, left)} is outside the {self.rows}x{self.columns} maze")
+
+        size = self.tileSize
+        cells = bytearray()
+        for tileRow in range(top // size, (top + rows - 1) // size + 1):
+            tileColumns = range(left // size, (left + columns - 1) // size + 1)
+            tiles = [self.tile(tileRow, tileColumn) for tileColumn in tileColumns]
+            widths = [self.tileShape(tileRow, tileColumn)[1] for tileColumn in tileColumns]
+
+            for row in range(max(top, tileRow * size), min(top + rows, (tileRow + 1) * size)):
+                inner = row - tileRow * size
+                for tileColumn, tile, width in zip(tileColumns, tiles, widths):
+                    start = max(left - tileColumn * size, 0)
+                    stop = min(left + columns - tileColumn * size, width)
+                    cells += tile[inner * width + start:inner * width + stop]
+
+        return GridMatrix.fromBuffer(rows, columns, cells, copy=False)
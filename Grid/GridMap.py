@@ -1,15 +1,164 @@
-from math import floor
-from random import randint
 from typing import *
 
 
+# Directions in the order `neighbors` reports them on odd cells: down, up, left, right.
+# Bit `i` of an open-direction mask is set when the neighbor in direction `i` is free.
+_DIRECTIONS: Tuple[Tuple[int, int], ...] = ((1, 0), (-1, 0), (0, -1), (0, 1))
+
+# `_NEIGHBOR_OFFSETS[parity][mask]` lists the offsets of the open neighbors of a cell
+# with the given `(x + y) % 2` parity, reversed on even cells to keep the checkerboard ordering.
+_NEIGHBOR_OFFSETS: Tuple[Tuple[Tuple[Tuple[int, int], ...], ...], ...] = tuple(
+    tuple(
+        tuple(_DIRECTIONS[i] for i in (range(3, -1, -1) if parity == 0 else range(4)) if mask >> i & 1)
+        for mask in range(16))
+    for parity in range(2))
+
+_INVERT = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+
 class GridMatrix():
     def __init__(self, rows: int, columns: int, preset: bool = False):
         self.rows = rows
         self.columns = columns
-        self._cells: List[List[int]] = [[preset for i in range(columns)] for j in range(rows)]
+        self._cells: bytearray = bytearray(b'\x01' if preset else b'\x00') * (rows * columns)
+        self._open: Optional[bytearray] = None
+        self._changed: List[Callable[[Optional[Tuple[int, int]]], None]] = []
+        self._fingerprint: Optional[Tuple[int, bytes]] = None
+        # Bumped on every mutation, so derived data can tell whether it is still current.
+        self.version = 0
+
+
+    @staticmethod
+    def fromBuffer(rows: int, columns: int, buffer: Union[bytes, bytearray, memoryview], copy: bool = True) -> "GridMatrix":
+        # Without `copy` a bytearray is taken over as it is, the caller must not keep using it.
+        if len(buffer) != rows * columns:
+            raise ValueError(f"Buffer of {len(buffer)} bytes does not match a {rows}x{columns} grid")
+
+        cells = buffer if not copy and isinstance(buffer, bytearray) else bytearray(buffer)
+        # Any other byte would corrupt the open-direction masks, which combine cells as single bits.
+        if cells.translate(None, b'\x00\x01'):
+            raise ValueError("Buffer cells must be 0 or 1")
+
+        result = GridMatrix(0, 0)
+        result.rows = rows
+        result.columns = columns
+        result._cells = cells
+        result._open = None
+        return result
+
+
+    def copy(self) -> "GridMatrix":
+        # The same cells without the change callbacks, e.g. a snapshot searched on another thread.
+        return GridMatrix.fromBuffer(self.rows, self.columns, self._cells)
+
+
+    def addChangeCallback(self, callback: Callable[[Optional[Tuple[int, int]]], None]) -> None:
+        # Callbacks get the cell that changed, or None after a bulk change such as a resize.
+        if callable(callback):
+            self._changed.append(callback)
+
+
+    def removeChangeCallback(self, callback: Callable[[Optional[Tuple[int, int]]], None]) -> None:
+        if callback in self._changed:
+            self._changed.remove(callback)
+
+
+    def _notifyChanged(self, cell: Optional[Tuple[int, int]]) -> None:
+        self.version += 1
+        for i in self._changed:
+            i(cell)
+
+
+    def fingerprint(self) -> bytes:
+        # Digest of the size and contents, so equal mazes loaded separately share cached results.
+        if self._fingerprint is None or self._fingerprint[0] != self.version:
+            # Imported here, hashlib costs a headless worker more to import than the grid itself.
+            from hashlib import blake2b
+            digest = blake2b(f"{self.rows}x{self.columns}".encode(), digest_size=16)
+            digest.update(self._cells)
+            self._fingerprint = (self.version, digest.digest())
+        return self._fingerprint[1]
+
+
+    @property
+    def buffer(self) -> memoryview:
+        # One byte per cell in row-major order: 1 is a wall, 0 is free.
+        # Read-only, changes go through `setRow` or `trySetCells` so the callbacks hear about them.
+        return memoryview(self._cells).toreadonly()
+
+
+    def index(self, cell: Tuple[int, int]) -> int:
+        return cell[0] * self.columns + cell[1]
+
+
+    def getRow(self, row: int) -> bytes:
+        return bytes(self._cells[row * self.columns:(row + 1) * self.columns])
+
+
+    def setRow(self, row: int, values: Union[bytes, bytearray, memoryview]) -> None:
+        if len(values) != self.columns:
+            raise ValueError(f"Row of {len(values)} cells in a grid of {self.columns} columns")
+        self._cells[row * self.columns:(row + 1) * self.columns] = values
+        self._open = None
+        self._notifyChanged(None)
+
+
+    @property
+    def openDirections(self) -> memoryview:
+        # Per-cell 4-bit masks of free neighbors, see `_DIRECTIONS` for the bit order.
+        return memoryview(self._openDirections())
+
+
+    def _openDirections(self) -> bytearray:
+        if self._open is None:
+            self._open = self._buildOpenDirections()
+        return self._open
+
+
+    def _buildOpenDirections(self) -> bytearray:
+        # Each mask byte is assembled from four shifted copies of the free-cell buffer.
+        # The copies are combined as big integers, which keeps the whole build in C:
+        # every byte holds 0 or 1, so shifting by the direction bit never carries over.
+        size = self.rows * self.columns
+        if size == 0:
+            return bytearray()
+
+        free = bytes(self._cells.translate(_INVERT))
+        padding = bytes(self.columns)
+        notFirstColumn = int.from_bytes((b'\x00' + b'\x01' * (self.columns - 1)) * self.rows, 'little')
+        notLastColumn = int.from_bytes((b'\x01' * (self.columns - 1) + b'\x00') * self.rows, 'little')
+
+        down = int.from_bytes(free[self.columns:] + padding, 'little')
+        up = int.from_bytes(padding + free[:size - self.columns], 'little')
+        left = int.from_bytes(b'\x00' + free[:-1], 'little') & notFirstColumn
+        right = int.from_bytes(free[1:] + b'\x00', 'little') & notLastColumn
+
+        return bytearray((down | up << 1 | left << 2 | right << 3).to_bytes(size, 'little'))
+
+
+    def _updateOpenDirections(self, cell: Tuple[int, int], free: bool) -> None:
+        if self._open is None:
+            return
+
+        (x, y) = cell
+        for direction, (dx, dy) in enumerate(_DIRECTIONS):
+            neighbor = (x - dx, y - dy)
+            if self.inBounds(neighbor):
+                index = neighbor[0] * self.columns + neighbor[1]
+                if free:
+                    self._open[index] |= 1 << direction
+                else:
+                    self._open[index] &= ~(1 << direction)
+
+
+    def neighborIndexOffsets(self) -> Tuple[Tuple[Tuple[int, int, int], ...], ...]:
+        # Indexed by `mask | parity << 4`, every entry lists `(index offset, dx, dy)` of the open
+        # neighbors in the same order as `neighbors`, for searches working on flat cell indices.
+        return tuple(
+            tuple((dx * self.columns + dy, dx, dy) for dx, dy in _NEIGHBOR_OFFSETS[parity][mask])
+            for parity in range(2) for mask in range(16))
+
 
-    
     def inBounds(self, cell: Tuple[int, int]) -> bool:
         (x, y) = cell
         return 0 <= x < self.rows and 0 <= y < self.columns
@@ -17,18 +166,29 @@ class GridMatrix():
 
     def neighbors(self, id: Tuple[int, int]) -> Iterator[Tuple[int, int]]:
         (x, y) = id
-        neighbors = [(x + 1, y), (x - 1, y), (x, y - 1), (x, y + 1)] 
-        if (x + y) % 2 == 0: neighbors.reverse() 
-        results = filter(self.inBounds, neighbors)
-        results = filter(lambda x: not self.getCell(x), results)
-        return results
+        if not self.inBounds(id):
+            neighbors = [(x + 1, y), (x - 1, y), (x, y - 1), (x, y + 1)]
+            if (x + y) % 2 == 0: neighbors.reverse()
+            results = filter(self.inBounds, neighbors)
+            results = filter(lambda x: not self.getCell(x), results)
+            return results
+
+        mask = self._openDirections()[x * self.columns + y]
+        return [(x + dx, y + dy) for dx, dy in _NEIGHBOR_OFFSETS[(x + y) & 1][mask]]
 
 
     def tryResize(self, rows: int, columns: int) -> bool:
         if rows > 9 and columns > 9:
-            self._cells = [[self._cells[j][i] if (j < self.rows and i < self.columns) else False for i in range(columns)] for j in range(rows)]
+            cells = bytearray(rows * columns)
+            width = min(columns, self.columns)
+            for j in range(min(rows, self.rows)):
+                cells[j * columns:j * columns + width] = self._cells[j * self.columns:j * self.columns + width]
+
+            self._cells = cells
+            self._open = None
             self.rows = rows
             self.columns = columns
+            self._notifyChanged(None)
             return True
         else:
             return False
@@ -36,7 +196,11 @@ class GridMatrix():
 
     def trySetCell(self, cell: Tuple[int, int]) -> bool:
         if self.inBounds(cell):
-            self._cells[cell[0]][cell[1]] = True
+            index = cell[0] * self.columns + cell[1]
+            if not self._cells[index]:
+                self._cells[index] = 1
+                self._updateOpenDirections(cell, False)
+                self._notifyChanged(cell)
             return True
         else:
             return False
@@ -44,15 +208,36 @@ class GridMatrix():
 
     def tryResetCell(self, cell: Tuple[int, int]) -> bool:
         if self.inBounds(cell):
-            self._cells[cell[0]][cell[1]] = False
+            index = cell[0] * self.columns + cell[1]
+            if self._cells[index]:
+                self._cells[index] = 0
+                self._updateOpenDirections(cell, True)
+                self._notifyChanged(cell)
             return True
         else:
             return False
 
 
+    def trySetCells(self, cells: Iterable[Tuple[int, int]], wall: bool = True) -> List[Tuple[int, int]]:
+        # Sets or clears many cells at once, such as a drawn stroke; cells out of bounds are skipped.
+        # The callbacks are told about every changed cell once all of them are written.
+        value = 1 if wall else 0
+        changed = []
+        for cell in cells:
+            if self.inBounds(cell):
+                index = cell[0] * self.columns + cell[1]
+                if self._cells[index] != value:
+                    self._cells[index] = value
+                    self._updateOpenDirections(cell, not wall)
+                    changed.append(cell)
+
+        for cell in changed:
+            self._notifyChanged(cell)
+        return changed
+
+
     def getCell(self, cell: Tuple[int, int]) -> bool:
         if self.inBounds(cell):
-            return self._cells[cell[0]][cell[1]]
+            return self._cells[cell[0] * self.columns + cell[1]] == 1
         else:
             return False
-
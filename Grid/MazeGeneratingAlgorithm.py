@@ -1,8 +1,7 @@
-from math import floor
-from random import randint, random
+from random import Random
 from Grid.GridMap import GridMatrix
 from abc import ABC, abstractmethod
-from typing import Tuple, List
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 
 class MazeGeneratingAlgorithm(ABC):
@@ -14,86 +13,274 @@ class MazeGeneratingAlgorithm(ABC):
     @staticmethod
     def isNotCorner(node: Tuple[int, int], x: int, y: int) -> bool:
         return node[0] == x or node[1] == y
- 
+
 
     @staticmethod
     def isNotNode(node: Tuple[int, int], x: int, y: int) -> bool:
         return not(node[0] == x and node[1] == y)
 
 
+    @staticmethod
+    def randomSource(seed: Union[int, Random, None] = None) -> Random:
+        # The same seed always gives the same maze; a `Random` instance is used as it is.
+        return seed if isinstance(seed, Random) else Random(seed)
+
+
+    @staticmethod
+    def latticeSize(rows: int, columns: int) -> Tuple[int, int]:
+        # Mazes are carved between the cells with both coordinates even, the lattice nodes.
+        return ((rows - 1) // 2 + 1, (columns - 1) // 2 + 1)
+
+
+    @staticmethod
+    def _lattice(rows: int, columns: int) -> bytearray:
+        # Every lattice node is free and every cell between the nodes is a wall,
+        # except the last row and column when they lie past the lattice.
+        (latticeRows, latticeColumns) = MazeGeneratingAlgorithm.latticeSize(rows, columns)
+        tail = b'\x00' * (columns - 2 * latticeColumns + 1)
+        nodeRow = b'\x00\x01' * (latticeColumns - 1) + b'\x00' + tail
+        wallRow = b'\x01' * (2 * latticeColumns - 1) + tail
+
+        cells = bytearray((nodeRow + wallRow) * (latticeRows - 1) + nodeRow)
+        cells += bytes(columns * (rows - 2 * latticeRows + 1))
+        return cells
+
+
+    @staticmethod
+    def _paddedLattice(latticeRows: int, latticeColumns: int, border: int = 1) -> bytearray:
+        # One byte per node with a frame of `border` bytes around the lattice,
+        # so stepping off the lattice never has to be checked separately.
+        width = latticeColumns + 2
+        nodes = bytearray([border]) * (width * (latticeRows + 2))
+        for i in range(1, latticeRows + 1):
+            nodes[i * width + 1:i * width + 1 + latticeColumns] = bytes(latticeColumns)
+        return nodes
+
+
     @staticmethod
     @abstractmethod
-    def generate(rows: int, columns: int) -> GridMatrix:
-        pass 
+    def generate(rows: int, columns: int, *, progress: Optional[Callable[[float], None]] = None,
+            seed: Union[int, Random, None] = None) -> GridMatrix:
+        # `progress` is called now and then with the finished fraction of the maze.
+        pass
 
 
 class DfsMazeGenerator(MazeGeneratingAlgorithm):
 
     @staticmethod
-    def __findNeighbors(node: Tuple[int, int], rows: int, columns: int):
-        neighbors = []
+    def generate(rows: int, columns: int, *, progress: Optional[Callable[[float], None]] = None,
+            seed: Union[int, Random, None] = None) -> GridMatrix:
+        random = MazeGeneratingAlgorithm.randomSource(seed)
+        (latticeRows, latticeColumns) = MazeGeneratingAlgorithm.latticeSize(rows, columns)
+        nodes = latticeRows * latticeColumns
+        cells = MazeGeneratingAlgorithm._lattice(rows, columns)
 
-        for y in range(node[1] - 2, node[1] + 3, 2):
-            for x in range(node[0] - 2, node[0] + 3, 2):
-                if MazeGeneratingAlgorithm.isOnGrid((x, y), rows, columns) and (
-                        MazeGeneratingAlgorithm.isNotCorner(node, x, y) and (
-                            MazeGeneratingAlgorithm.isNotNode(node, x, y))):
-                    neighbors.append((x, y))
+        # Nodes are visited on the padded lattice while the maze is carved in `cells`:
+        # every move is `(node step, wall offset)`, the next node lies twice the wall offset away.
+        # The order is left, up, down, right, as the neighbors have always been listed.
+        width = latticeColumns + 2
+        visited = MazeGeneratingAlgorithm._paddedLattice(latticeRows, latticeColumns)
+        moves = ((-1, -1), (-width, -columns), (width, columns), (1, 1))
 
-        return neighbors
+        x = random.randint(0, latticeRows - 1)
+        y = random.randint(0, latticeColumns - 1)
+        start = (x + 1) * width + y + 1
+        visited[start] = 1
 
+        pathStack = [(start, 2 * x * columns + 2 * y)]
+        count = 1
+        steps = 0
+        while pathStack:
+            steps += 1
+            if progress is not None and steps % 4096 == 0:
+                progress(count / nodes)
 
-    @staticmethod
-    def generate(rows: int, columns: int) -> GridMatrix:
-        result = GridMatrix(rows, columns, preset=True)
-
-        for x in range(floor((result.rows - 1) / 2) * 2 + 1, result.rows):
-            for y in range(result.columns):
-                result.tryResetCell((x, y))
-
-        for y in range(floor((result.columns - 1) / 2) * 2 + 1, result.columns):
-            for x in range(result.rows):
-                result.tryResetCell((x, y))
-                
-
-        x = randint(0, floor((result.rows - 1) / 2)) * 2 
-        y = randint(0, floor((result.columns - 1) / 2)) * 2
-
-        visited = set() 
-
-        pathStack = [(x, y)]
-        visited.add((x, y))
-
-        while len(pathStack) > 0:
-            cell = pathStack.pop()
-            neighbors = list(filter(lambda x: not (x in visited), DfsMazeGenerator.__findNeighbors(cell, rows, columns)))
-
-            if len(neighbors) > 0:
-                randomIndex = randint(0, len(neighbors) - 1)
-
-                for i in range(len(neighbors)):
-                    result.tryResetCell(neighbors[i])
-                    visited.add(neighbors[i])
-
-                    if neighbors[i][0] == cell[0]:
-                        if neighbors[i][1] < cell[1]:
-                            result.tryResetCell((neighbors[i][0], neighbors[i][1] + 1))
-                            
-                        elif neighbors[i][1] > cell[1]:
-                            result.tryResetCell((neighbors[i][0], neighbors[i][1] - 1))
-                        
-                    elif neighbors[i][1] == cell[1]:
-                        if neighbors[i][0] < cell[0]:
-                            result.tryResetCell((neighbors[i][0] + 1, neighbors[i][1]))
-                            
-                        elif neighbors[i][0] > cell[0]:
-                            result.tryResetCell((neighbors[i][0] - 1, neighbors[i][1]))
+            (node, cell) = pathStack.pop()
+            neighbors = [(node + step, cell + wall) for step, wall in moves if not visited[node + step]]
+            if neighbors:
+                randomIndex = random.randint(0, len(neighbors) - 1)
+                count += len(neighbors)
 
+                for i, (neighbor, wall) in enumerate(neighbors):
+                    visited[neighbor] = 1
+                    cells[wall] = 0
                     if i != randomIndex:
-                        
-                        pathStack.append(neighbors[i])
-            
-                pathStack.append(neighbors[randomIndex])
+                        pathStack.append((neighbor, 2 * wall - cell))
+
+                (neighbor, wall) = neighbors[randomIndex]
+                pathStack.append((neighbor, 2 * wall - cell))
+
+        return GridMatrix.fromBuffer(rows, columns, cells, copy=False)
+
+
+class KruskalMazeGenerator(MazeGeneratingAlgorithm):
+
+    @staticmethod
+    def generate(rows: int, columns: int, *, progress: Optional[Callable[[float], None]] = None,
+            seed: Union[int, Random, None] = None) -> GridMatrix:
+        random = MazeGeneratingAlgorithm.randomSource(seed)
+        (latticeRows, latticeColumns) = MazeGeneratingAlgorithm.latticeSize(rows, columns)
+        nodes = latticeRows * latticeColumns
+        cells = MazeGeneratingAlgorithm._lattice(rows, columns)
+
+        # Edge `2 * node` joins a node with its right neighbor, `2 * node + 1` with the one below.
+        edges = [2 * node for node in range(nodes) if node % latticeColumns != latticeColumns - 1]
+        edges += [2 * node + 1 for node in range((latticeRows - 1) * latticeColumns)]
+        random.shuffle(edges)
+
+        parent = list(range(nodes))
+        carved = 0
+        for step, edge in enumerate(edges):
+            if progress is not None and step % 4096 == 0:
+                progress(step / len(edges))
+
+            node = edge >> 1
+            neighbor = node + (latticeColumns if edge & 1 else 1)
+
+            # Union-find with path halving.
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            while parent[neighbor] != neighbor:
+                parent[neighbor] = parent[parent[neighbor]]
+                neighbor = parent[neighbor]
+            if node == neighbor:
+                continue
+
+            parent[node] = neighbor
+            (x, y) = divmod(edge >> 1, latticeColumns)
+            cells[2 * x * columns + 2 * y + (columns if edge & 1 else 1)] = 0
+            carved += 1
+            if carved == nodes - 1:
+                break
 
+        return GridMatrix.fromBuffer(rows, columns, cells, copy=False)
+
+
+class WilsonMazeGenerator(MazeGeneratingAlgorithm):
+    # Loop-erased random walks, so every spanning tree of the lattice is equally likely.
+
+    @staticmethod
+    def generate(rows: int, columns: int, *, progress: Optional[Callable[[float], None]] = None,
+            seed: Union[int, Random, None] = None) -> GridMatrix:
+        random = MazeGeneratingAlgorithm.randomSource(seed)
+        (latticeRows, latticeColumns) = MazeGeneratingAlgorithm.latticeSize(rows, columns)
+        nodes = latticeRows * latticeColumns
+        cells = MazeGeneratingAlgorithm._lattice(rows, columns)
+
+        # 0 is a node outside the tree, 1 a node in it and 2 the frame around the lattice.
+        width = latticeColumns + 2
+        state = MazeGeneratingAlgorithm._paddedLattice(latticeRows, latticeColumns, border=2)
+        steps = (-1, -width, width, 1)
+        walls = (-1, -columns, columns, 1)
+        heading = bytearray(len(state))
+
+        x = random.randint(0, latticeRows - 1)
+        y = random.randint(0, latticeColumns - 1)
+        state[(x + 1) * width + y + 1] = 1
+        count = 1
+        reported = 0
+
+        for start in range(width + 1, len(state) - width - 1):
+            if state[start]:
+                continue
+
+            # Walking over the same node again overwrites its heading, which erases the loop.
+            node = start
+            while state[node] != 1:
+                direction = random.randrange(4)
+                if state[node + steps[direction]] != 2:
+                    heading[node] = direction
+                    node += steps[direction]
+
+            node = start
+            while state[node] != 1:
+                state[node] = 1
+                direction = heading[node]
+                (x, y) = divmod(node, width)
+                cells[2 * (x - 1) * columns + 2 * (y - 1) + walls[direction]] = 0
+                node += steps[direction]
+                count += 1
+
+            if progress is not None and count >= reported + 4096:
+                reported = count
+                progress(count / nodes)
+
+        return GridMatrix.fromBuffer(rows, columns, cells, copy=False)
+
+
+class EllerMazeGenerator(MazeGeneratingAlgorithm):
+    # Builds the maze one lattice row at a time and only remembers which set every node
+    # of the current row belongs to, so `generateRows` needs memory for a single row.
+
+    @staticmethod
+    def generateRows(rows: int, columns: int, *, seed: Union[int, Random, None] = None) -> Iterator[bytes]:
+        random = MazeGeneratingAlgorithm.randomSource(seed)
+        (latticeRows, latticeColumns) = MazeGeneratingAlgorithm.latticeSize(rows, columns)
+        tail = b'\x00' * (columns - 2 * latticeColumns + 1)
+        nodeRow = b'\x00\x01' * (latticeColumns - 1) + b'\x00' + tail
+        wallRow = b'\x01' * (2 * latticeColumns - 1) + tail
+
+        # Sets are numbered anew on every row, so `parent` never holds more than `latticeColumns` entries.
+        labels: List[Optional[int]] = [None] * latticeColumns
+        parent = list(range(latticeColumns))
+
+        def find(label: int) -> int:
+            while parent[label] != label:
+                parent[label] = parent[parent[label]]
+                label = parent[label]
+            return label
+
+        for i in range(latticeRows):
+            numbers: Dict[int, int] = {}
+            for j, label in enumerate(labels):
+                if label is not None:
+                    labels[j] = numbers.setdefault(label, len(numbers))
+            fresh = len(numbers)
+            for j, label in enumerate(labels):
+                if label is None:
+                    labels[j] = fresh
+                    fresh += 1
+            parent[:] = range(latticeColumns)
+
+            # Neighbors in different sets are joined at random, and all of them on the last row.
+            last = i == latticeRows - 1
+            row = bytearray(nodeRow)
+            for j in range(latticeColumns - 1):
+                left, right = find(labels[j]), find(labels[j + 1])
+                if left != right and (last or random.random() < 0.5):
+                    parent[left] = right
+                    row[2 * j + 1] = 0
+            yield bytes(row)
+
+            if last:
+                break
+
+            # Every set goes on down from at least one of its nodes, the other nodes start new sets.
+            sets: Dict[int, List[int]] = {}
+            for j in range(latticeColumns):
+                sets.setdefault(find(labels[j]), []).append(j)
+
+            row = bytearray(wallRow)
+            labels = [None] * latticeColumns
+            for label, members in sets.items():
+                down = [j for j in members if random.random() < 0.5] or [members[random.randrange(len(members))]]
+                for j in down:
+                    labels[j] = label
+                    row[2 * j] = 0
+            yield bytes(row)
+
+        for i in range(rows - 2 * latticeRows + 1):
+            yield bytes(columns)
+
+
+    @staticmethod
+    def generate(rows: int, columns: int, *, progress: Optional[Callable[[float], None]] = None,
+            seed: Union[int, Random, None] = None) -> GridMatrix:
+        cells = bytearray()
+        for i, row in enumerate(EllerMazeGenerator.generateRows(rows, columns, seed=seed)):
+            if progress is not None and i % 256 == 0:
+                progress(i / rows)
+            cells += row
 
-        return result
\ No newline at end of file
+        return GridMatrix.fromBuffer(rows, columns, cells, copy=False)
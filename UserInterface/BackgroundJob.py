@@ -0,0 +1,58 @@
+import PyQt5.QtCore as QtCore
+
+from typing import *
+import time
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class BackgroundJob(QtCore.QThread):
+    # Runs `work` on its own thread. `work` is given a `report(fraction)` callback to call now and then,
+    # it forwards the progress and raises `JobCancelled` once the job has been cancelled.
+    progressChanged = QtCore.pyqtSignal(float)
+    succeeded = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+
+    # Seconds between two progress signals, so the GUI thread is not flooded with them.
+    reportInterval: float = 0.05
+
+
+    def __init__(self, work: Callable[[Callable[[float], None]], Any], parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self._work = work
+        self._cancelled = False
+        self._reported = 0.0
+
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+
+    def _report(self, fraction: float) -> None:
+        if self._cancelled:
+            raise JobCancelled()
+
+        now = time.perf_counter()
+        if now - self._reported >= BackgroundJob.reportInterval:
+            self._reported = now
+            self.progressChanged.emit(fraction)
+
+
+    def run(self) -> None:
+        try:
+            result = self._work(self._report)
+        except JobCancelled:
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        if not self._cancelled:
+            self.succeeded.emit(result)
@@ -2,37 +2,228 @@ import PyQt5.QtWidgets as QtWidgets
 import PyQt5.QtCore as QtCore
 import PyQt5.QtGui as QtGui
 
-from math import floor
+from math import ceil, floor
 from typing import *
 import enum
 import colorsys
+import time
 
 from Grid.GridMap import *
 from Algorithms.PathFindingAlgorithm import *
+from Algorithms.PathCache import PathCache
+from Algorithms.IncrementalPathFinding import LifelongPlanningAStar
+from UserInterface.BackgroundJob import BackgroundJob
+from FileSystem.TiledGridFile import TiledGridLoader
 
 
 class WallGridWidget(QtWidgets.QWidget):
 
+    # Zooming in stops once a cell is this many pixels wide.
+    maxSquareSize: float = 64
+
 
     def __init__(self, rows, columns, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setMinimumSize(600, 600)
+        # Walls and grid lines are painted once into `_wallLayer`, then patched cell by cell.
+        self._wallLayer: Optional[QtGui.QPixmap] = None
+        # `zoom` scales the square size that fits the whole grid, `pan` shifts the centered canvas in pixels.
+        self.zoom = 1.0
+        self.pan = (0.0, 0.0)
+        self._panFrom: Optional[QtCore.QPoint] = None
+        # With a tiled file open the grid is a window of it at `tileOrigin`, moved as the view is panned past its edges.
+        self.tiles: Optional[TiledGridLoader] = None
+        self.tileOrigin = (0, 0)
+        self._grid: Optional[GridMatrix] = None
         self.grid = GridMatrix(rows, columns)
 
 
+    @property
+    def grid(self) -> GridMatrix:
+        return self._grid
+
+
+    @grid.setter
+    def grid(self, newGrid: GridMatrix) -> None:
+        self.closeTiles()
+        self._attachGrid(newGrid)
+
+
+    def _attachGrid(self, newGrid: GridMatrix) -> None:
+        if self._grid is not None:
+            self._grid.removeChangeCallback(self._onCellChanged)
+
+        self._grid = newGrid
+        self._grid.addChangeCallback(self._onCellChanged)
+        self.zoom = 1.0
+        self.pan = (0.0, 0.0)
+        self._wallLayer = None
+
+
+    def openTiles(self, tiles: TiledGridLoader, top: int, left: int, rows: int, columns: int) -> None:
+        # Shows the given region of a tiled file; the widget closes `tiles` once it shows another grid.
+        self.grid = tiles.load(top, left, rows, columns)
+        self.tiles = tiles
+        self.tileOrigin = (top, left)
+
+
+    def closeTiles(self) -> None:
+        if self.tiles is not None:
+            self.tiles.close()
+            self.tiles = None
+            self.tileOrigin = (0, 0)
+
+
+    def _canPage(self) -> bool:
+        return self.tiles is not None
+
+
+    def _moveWindow(self, rows: int, columns: int) -> None:
+        # Moves the window over the tiled file by up to `rows` and `columns` cells. The cells it still covers
+        # are kept with their edits, only the newly exposed strips are read, from the tiles `tiles` caches.
+        top, left = self.tileOrigin
+        height, width = self.grid.rows, self.grid.columns
+        newTop = min(max(top + rows, 0), self.tiles.rows - height)
+        newLeft = min(max(left + columns, 0), self.tiles.columns - width)
+        rows, columns = newTop - top, newLeft - left
+        if rows == 0 and columns == 0:
+            return
+
+        keepTop, keepLeft = max(top, newTop), max(left, newLeft)
+        keepRows, keepColumns = height - abs(rows), width - abs(columns)
+        if keepRows <= 0 or keepColumns <= 0:
+            grid = self.tiles.load(newTop, newLeft, height, width)
+        else:
+            # The band of new rows spans the whole window, the strip of new columns only the kept rows.
+            band = self.tiles.load(newTop if rows < 0 else keepTop + keepRows, newLeft, abs(rows), width).buffer if rows else b''
+            strip = self.tiles.load(keepTop, newLeft if columns < 0 else keepLeft + keepColumns, keepRows, abs(columns)).buffer if columns else b''
+            cells = bytearray(band if rows < 0 else b'')
+            old = self.grid.buffer
+            for row in range(keepRows):
+                start = (keepTop - top + row) * width + keepLeft - left
+                kept = old[start:start + keepColumns]
+                added = strip[row * abs(columns):(row + 1) * abs(columns)]
+                cells += added if columns < 0 else kept
+                cells += kept if columns < 0 else added
+            cells += band if rows > 0 else b''
+            grid = GridMatrix.fromBuffer(height, width, cells, copy=False)
+
+        # The view stays on the same cells of the file.
+        zoom, pan = self.zoom, self.pan
+        self._attachGrid(grid)
+        self.tileOrigin = (newTop, newLeft)
+        self.zoom = zoom
+        self.pan = (pan[0] + columns * self.squareSize, pan[1] + rows * self.squareSize)
+        self.setSquareSize()
+        self._onWindowMoved(rows, columns)
+
+
+    def _onWindowMoved(self, rows: int, columns: int) -> None:
+        pass
+
+
+    def _onCellChanged(self, cell: Optional[Tuple[int, int]]) -> None:
+        if cell is None or self._wallLayer is None:
+            self._wallLayer = None
+        else:
+            self._patchWallLayer(cell)
+
+
     def setSquareSize(self) -> None:
         reference = self.width() * self.grid.rows / self.grid.columns
 
         if reference > self.height():
-            self.squareSize = (self.height() - 1) / self.grid.rows
+            fitSize = (self.height() - 1) / self.grid.rows
         else:
-            self.squareSize = (self.width() - 1) / self.grid.columns
+            fitSize = (self.width() - 1) / self.grid.columns
+
+        self.zoom = min(max(self.zoom, 1), max(WallGridWidget.maxSquareSize / fitSize, 1))
+        self.squareSize = fitSize * self.zoom
+        self.__clampPan()
+
+        self._wallLayer = None
+
+
+    def __clampPan(self) -> None:
+        # A canvas smaller than the widget stays centered, a larger one can be moved until its edges reach the widget's.
+        width, height = self.getCanvasSize()
+        x = max(0, (width - self.width()) / 2)
+        y = max(0, (height - self.height()) / 2)
+        self.pan = (min(max(self.pan[0], -x), x), min(max(self.pan[1], -y), y))
+
+
+    def zoomAt(self, point: QtCore.QPoint, factor: float) -> None:
+        # The point of the grid under `point` stays under it.
+        left, top = self.getCanvasOrigin()
+        x = (point.x() - left) / self.squareSize
+        y = (point.y() - top) / self.squareSize
+
+        self.zoom *= factor
+        self.setSquareSize()
+
+        width, height = self.getCanvasSize()
+        self.pan = (point.x() - x * self.squareSize - (self.width() - width) / 2,
+                    point.y() - y * self.squareSize - (self.height() - height) / 2)
+        self.__clampPan()
+        self.update()
+
+
+    def panBy(self, dx: float, dy: float) -> None:
+        x, y = self.pan[0] + dx, self.pan[1] + dy
+        self.pan = (x, y)
+        self.__clampPan()
+
+        # Pulling a view that can be panned past an edge of a tiled window moves the window by half its size that way.
+        if self._canPage():
+            width, height = self.getCanvasSize()
+            rows = ((y < self.pan[1]) - (y > self.pan[1])) * (height > self.height())
+            columns = ((x < self.pan[0]) - (x > self.pan[0])) * (width > self.width())
+            if rows or columns:
+                self._moveWindow(rows * (self.grid.rows // 2), columns * (self.grid.columns // 2))
+        self._wallLayer = None
+        self.update()
+
+
+    def resetView(self) -> None:
+        self.zoom = 1.0
+        self.pan = (0.0, 0.0)
+        self.setSquareSize()
+        self.update()
 
 
     def resizeEvent(self, event) -> None:
         return self.setSquareSize()
 
 
+    def wheelEvent(self, event: QtGui.QWheelEvent) -> None:
+        self.zoomAt(event.pos(), 1.25 ** (event.angleDelta().y() / 120))
+
+
+    def mousePressEvent(self, event: QtGui.QMouseEvent) -> None:
+        if event.button() == QtCore.Qt.MiddleButton:
+            self._panFrom = event.pos()
+        return super().mousePressEvent(event)
+
+
+    def mouseDoubleClickEvent(self, event: QtGui.QMouseEvent) -> None:
+        if event.button() == QtCore.Qt.MiddleButton:
+            self.resetView()
+        return super().mouseDoubleClickEvent(event)
+
+
+    def mouseMoveEvent(self, event: QtGui.QMouseEvent) -> None:
+        if self._panFrom is not None:
+            self.panBy(event.pos().x() - self._panFrom.x(), event.pos().y() - self._panFrom.y())
+            self._panFrom = event.pos()
+        return super().mouseMoveEvent(event)
+
+
+    def mouseReleaseEvent(self, event: QtGui.QMouseEvent) -> None:
+        if event.button() == QtCore.Qt.MiddleButton:
+            self._panFrom = None
+        return super().mouseReleaseEvent(event)
+
+
     def getCanvasSize(self) -> Tuple[int, int]:
         width = self.squareSize * self.grid.columns
         height = self.squareSize * self.grid.rows
@@ -43,49 +234,118 @@ class WallGridWidget(QtWidgets.QWidget):
     def getCanvasOrigin(self) -> Tuple[int, int]:
         width, height = self.getCanvasSize()
 
-        left = (self.width() - width) / 2
-        top = (self.height() - height) / 2
+        left = (self.width() - width) / 2 + self.pan[0]
+        top = (self.height() - height) / 2 + self.pan[1]
 
         return (left, top)
 
 
-    def _drawWalls(self, qpainter: QtGui.QPainter) -> None:
+    def visibleCells(self, area: Optional[QtCore.QRect] = None) -> Tuple[range, range]:
+        # Rows and columns of the cells that are at least partly inside `area`, by default the whole widget.
         left, top = self.getCanvasOrigin()
+        area = area or self.rect()
+        rows = range(max(floor((area.top() - 1 - top) / self.squareSize), 0),
+            min(ceil((area.bottom() + 2 - top) / self.squareSize), self.grid.rows))
+        columns = range(max(floor((area.left() - 1 - left) / self.squareSize), 0),
+            min(ceil((area.right() + 2 - left) / self.squareSize), self.grid.columns))
+
+        return (rows, columns)
+
+
+    def cellAt(self, point: QtCore.QPoint) -> Tuple[int, int]:
+        # The cell under `point`, which may lie outside the grid.
+        left, top = self.getCanvasOrigin()
+        return (floor((point.y() - top) / self.squareSize), floor((point.x() - left) / self.squareSize))
+
+
+    def _drawWalls(self, qpainter: QtGui.QPainter, rows: Optional[range] = None, columns: Optional[range] = None) -> None:
+        left, top = self.getCanvasOrigin()
+        if rows is None or columns is None:
+            rows, columns = self.visibleCells()
 
         rectangle = QtCore.QRectF(0, 0, self.squareSize, self.squareSize)
 
         qpainter.setOpacity(1)
         qpainter.setBrush(QtGui.QColor(32, 32, 32))
-        for row in range(self.grid.rows):
-            for column in range(self.grid.columns):
-                if self.grid.getCell((row, column)):
-                    qpainter.drawRect(rectangle.translated(
-                        left + column * self.squareSize, top + row * self.squareSize))
+        for row in rows:
+            cells = self.grid.getRow(row)
+            column = cells.find(1, columns.start, columns.stop)
+            while column >= 0:
+                qpainter.drawRect(rectangle.translated(
+                    left + column * self.squareSize, top + row * self.squareSize))
+                column = cells.find(1, column + 1, columns.stop)
 
 
-    def _drawScene(self, qpainter: QtGui.QPainter) -> None:
-        width, height = self.getCanvasSize()
+    def _drawScene(self, qpainter: QtGui.QPainter, rows: Optional[range] = None, columns: Optional[range] = None) -> None:
+        # `rows` and `columns` select the lines around those cells, the lines end at the outer ones.
         left, top = self.getCanvasOrigin()
+        if rows is None or columns is None:
+            rows, columns = self.visibleCells()
+
+        x0, x1 = left + columns.start * self.squareSize, left + columns.stop * self.squareSize
+        y0, y1 = top + rows.start * self.squareSize, top + rows.stop * self.squareSize
 
         qpainter.setOpacity(0.1)
-        y = top
-        for row in range(self.grid.rows + 1):
-            qpainter.drawLine(left, y, left + width, y)
-            y += self.squareSize
+        for row in range(rows.start, rows.stop + 1):
+            y = top + row * self.squareSize
+            qpainter.drawLine(QtCore.QLineF(x0, y, x1, y))
 
-        x = left
-        for column in range(self.grid.columns + 1):
-            qpainter.drawLine(x, top, x, top + height)
-            x += self.squareSize
+        for column in range(columns.start, columns.stop + 1):
+            x = left + column * self.squareSize
+            qpainter.drawLine(QtCore.QLineF(x, y0, x, y1))
 
 
-    def paintEvent(self, event: QtCore.QEvent) -> None:
-        qpainter = QtGui.QPainter(self)
+    def _createLayerPainter(self) -> QtGui.QPainter:
+        qpainter = QtGui.QPainter(self._wallLayer)
         qpainter.translate(.5, .5)
         qpainter.setRenderHints(qpainter.Antialiasing)
+        return qpainter
+
+
+    def _wallLayerPixmap(self) -> QtGui.QPixmap:
+        if self._wallLayer is None or self._wallLayer.size() != self.size():
+            self._wallLayer = QtGui.QPixmap(self.size())
+            self._wallLayer.fill(QtCore.Qt.transparent)
+
+            qpainter = self._createLayerPainter()
+            self._drawScene(qpainter)
+            self._drawWalls(qpainter)
+            qpainter.end()
+
+        return self._wallLayer
+
+
+    def _cellBounds(self, cell: Tuple[int, int]) -> QtCore.QRect:
+        # Pixels covered by `cell`, including its outline and antialiasing.
+        left, top = self.getCanvasOrigin()
+        (row, column) = cell
+        return QtCore.QRectF(left + column * self.squareSize, top + row * self.squareSize,
+            self.squareSize, self.squareSize).toAlignedRect().adjusted(-2, -2, 2, 2)
+
+
+    def _patchWallLayer(self, cell: Tuple[int, int]) -> None:
+        # Clears the cell and repaints everything that overlaps it, in the order of a full rebuild.
+        bounds = self._cellBounds(cell)
+        rows = range(max(cell[0] - 1, 0), min(cell[0] + 2, self.grid.rows))
+        columns = range(max(cell[1] - 1, 0), min(cell[1] + 2, self.grid.columns))
+
+        # The painter is shifted by half a pixel, the clip is given in pixels of the layer.
+        area = QtCore.QRectF(bounds).translated(-.5, -.5)
+        qpainter = self._createLayerPainter()
+        qpainter.setClipRect(area)
+        qpainter.setCompositionMode(QtGui.QPainter.CompositionMode_Clear)
+        qpainter.fillRect(area, QtCore.Qt.transparent)
+        qpainter.setCompositionMode(QtGui.QPainter.CompositionMode_SourceOver)
 
-        self._drawScene(qpainter)
-        self._drawWalls(qpainter)
+        self._drawScene(qpainter, rows, columns)
+        self._drawWalls(qpainter, rows, columns)
+        qpainter.end()
+
+
+    def paintEvent(self, event: QtCore.QEvent) -> None:
+        qpainter = QtGui.QPainter(self)
+        qpainter.drawPixmap(0, 0, self._wallLayerPixmap())
+        qpainter.end()
 
 
 
@@ -114,13 +374,46 @@ class SolverGridWidget(WallGridWidget):
         solved = 5
 
 
+    # The solving animation shows this many frames per second at most, every frame applies all the
+    # steps due by then. At the maximal speed a frame spends `frameBudget` of its time on steps.
+    frameRate: float = 60
+    frameBudget: float = 0.5
+
+    # Below this many pixels per cell the grid is drawn as an image with one pixel per cell.
+    rasterThreshold: float = 4
+
+    # Color indices of the raster image: the trace statuses map to `open` and `closed`,
+    # the path gets a gradient over the indices from `path` up.
+    _raster: Dict[str, int] = {'free': 0, 'wall': 1, 'open': 2, 'closed': 3, 'source': 4, 'target': 5, 'path': 8}
+    # Walls and statuses are first combined as bits, so that merged cells keep all of them,
+    # then `_rasterMerged` picks the color index of the most important one.
+    _rasterStatus: bytes = bytes((0, 2, 4, 0)[i & 3] for i in range(256))
+    _rasterMerged: bytes = bytes((0, 1, 2, 2, 3, 3, 3, 3)[i & 7] for i in range(256))
+    _explored: bytes = bytes(1 if i & 3 else 0 for i in range(256))
+
+
     def __init__(self, rows: int, columns: int, *args, **kwargs):
         super().__init__(rows, columns, *args, **kwargs)
+        # None picks the raster mode by `rasterThreshold`, True or False forces it.
+        self.rasterMode: Optional[bool] = None
+        self._rasterColors: Optional[List[int]] = None
+        # The key, the pixels and the image of the last raster frame.
+        self._rasterFrame: Optional[Tuple[tuple, bytes, QtGui.QImage]] = None
         self.target = (0, 0)
         self.source = (rows - 1, columns - 1)
         self.algorithm = AStarAlgorithm()
-
-        self._interval = 100
+        self.pathCache = PathCache()
+        # Repairs the shown path while walls are edited in the solved state.
+        self.planner: Optional[LifelongPlanningAStar] = None
+        self._replanning = False
+        self._editingSolved = False
+        # The cell the wall stroke in progress has reached.
+        self._strokeFrom: Tuple[int, int] = (0, 0)
+        self._result: Optional[Tuple[tuple, Optional[List[Tuple[int, int]]], List[QtGui.QColor]]] = None
+
+        # None steps as fast as `frameBudget` allows.
+        self._stepsPerSecond: Optional[float] = 10
+        self._pendingSteps = 0.0
 
         self.drawMode = SolverGridWidget.DrawMode.walls
         self.installEventFilter(self)
@@ -128,7 +421,54 @@ class SolverGridWidget(WallGridWidget):
         self._state = SolverGridWidget.State.viewing
         self._stateChanged = []
 
-        self.timer = QtCore.QTimer(self, timeout = self.__dequeueSolveStep, interval = self._interval)
+        # Searches and generation run here, one at a time; the state callbacks hear about its progress.
+        self.job: Optional[BackgroundJob] = None
+        self.jobProgress = 0.0
+        # The live grid and its snapshot returned by `searchGrid`, and the cells edited since it was updated;
+        # None when it has to be copied anew.
+        self._snapshot: Optional[Tuple[GridMatrix, GridMatrix]] = None
+        self._dirtyCells: Optional[Set[Tuple[int, int]]] = None
+
+        # The `_result` key the running job is solving, None for other jobs.
+        self._solveKey: Optional[tuple] = None
+        # Set while `__updateResult` waits to run after the current paint.
+        self._resultScheduled = False
+
+        # The frames follow the refresh rate of the display where it is known.
+        screen = QtGui.QGuiApplication.primaryScreen()
+        if screen is not None and screen.refreshRate() > 0:
+            self.frameRate = screen.refreshRate()
+
+        self.timer = QtCore.QTimer(self, timeout = self.__dequeueSolveStep, interval = round(1000 / self.frameRate))
+
+
+    def _onCellChanged(self, cell: Optional[Tuple[int, int]]) -> None:
+        super()._onCellChanged(cell)
+        self.__patchRasterFrame(cell)
+        if cell is None:
+            self._dirtyCells = None
+        elif self._dirtyCells is not None:
+            self._dirtyCells.add(cell)
+
+
+    def searchGrid(self) -> GridMatrix:
+        # Searches run on a snapshot, so the walls stay editable while a job reads it. It is always the same
+        # object, brought up to date cell by cell, so the caches following its callbacks (`PathCache`,
+        # the HPA* cluster graphs) only redo what the edits touched. A running job keeps reading it,
+        # a new one meanwhile gets a copy of its own.
+        if self.job is not None:
+            return self.grid.copy()
+
+        snapshot = self._snapshot
+        if snapshot is None or snapshot[0] is not self.grid or self._dirtyCells is None:
+            self._snapshot = (self.grid, self.grid.copy())
+        elif self._dirtyCells:
+            walls = [cell for cell in self._dirtyCells if self.grid.getCell(cell)]
+            snapshot[1].trySetCells(walls, True)
+            snapshot[1].trySetCells(self._dirtyCells.difference(walls), False)
+
+        self._dirtyCells = set()
+        return self._snapshot[1]
 
 
     def setAlgorithm(self, algorithm: PathFindingAlgorithm) -> None:
@@ -136,12 +476,53 @@ class SolverGridWidget(WallGridWidget):
 
 
     def setAlgorithmSolveQueue(self) -> None:
-        self.solveQueue = self.algorithm.getSolveQueue(self.grid, self.source, self.target)
-        self.used = []
+        # The search runs lazily, a timer tick only records the steps it shows. It reads a snapshot,
+        # since the rest of it may be recorded by a job while the walls are edited.
+        self.solveTrace = self.algorithm.getSolveQueue(self.searchGrid(), self.source, self.target, lazy=True)
+        self.traceCursor = self.solveTrace.cursor()
         self.currentPath = []
+        # The explored cells of the result come from the new trace.
+        self._result = None
+
+
+    def seekSolveStep(self, step: int) -> None:
+        # Any recorded step can be shown, including earlier ones.
+        self.traceCursor.seek(step)
+        self.__showSolveStep()
+
+
+    def __showSolveStep(self) -> None:
+        # The explored cells are read straight from the cursor when they are drawn.
+        expanded, examined = self.traceCursor.current()
+        path = None if examined is None else self.traceCursor.pathTo(examined)
+        if path is None and expanded is not None:
+            path = (self.traceCursor.pathTo(expanded) or [expanded]) + ([] if examined is None else [examined])
+        self.currentPath = path or []
+        self.update()
+
+
+    def _canPage(self) -> bool:
+        # The trace and the path of a search belong to the window it ran on.
+        return super()._canPage() and self.state == SolverGridWidget.State.viewing and self.job is None
+
+
+    def _onWindowMoved(self, rows: int, columns: int) -> None:
+        # The endpoints stay on their cells of the file while the window still covers them.
+        self.target = (self.target[0] - rows, self.target[1] - columns)
+        if not self.grid.inBounds(self.target):
+            self.target = (0, 0)
+            self.grid.tryResetCell(self.target)
+
+        self.source = (self.source[0] - rows, self.source[1] - columns)
+        if not self.grid.inBounds(self.source):
+            self.source = (self.grid.rows - 1, self.grid.columns - 1)
+            self.grid.tryResetCell(self.source)
 
 
     def resizeGrid(self, rows: int, columns: int) -> None:
+        # A resized grid is no longer a window of the tiled file.
+        if (rows, columns) != (self.grid.rows, self.grid.columns):
+            self.closeTiles()
         self.grid.tryResize(rows, columns)
 
         if self.target[0] >= self.grid.rows or self.target[1] >= self.grid.columns:
@@ -157,7 +538,138 @@ class SolverGridWidget(WallGridWidget):
 
 
     def solve(self) -> List[Tuple[int, int]]:
-        return self.algorithm.solve(self.grid, self.source, self.target)
+        if self._replanning:
+            return self.replan()
+        return self.pathCache.solve(self.algorithm, self.grid, self.source, self.target)
+
+
+    def replan(self) -> List[Tuple[int, int]]:
+        if self.planner is None or self.planner.gridMatrix is not self.grid:
+            if self.planner is not None:
+                self.planner.detach()
+            self.planner = LifelongPlanningAStar(self.grid, self.source, self.target)
+
+        self.planner.setEndpoints(self.source, self.target)
+        return self.planner.solve()
+
+
+    def startJob(self, work: Callable[[Callable[[float], None]], Any], onSuccess: Callable[[Any], None]) -> BackgroundJob:
+        # `work` runs on a worker thread and must not touch the widget, `onSuccess` gets its result on this one.
+        job = BackgroundJob(work, self)
+        job.progressChanged.connect(self.__onJobProgress)
+        job.succeeded.connect(onSuccess)
+        job.failed.connect(self.__onJobFailed)
+        job.finished.connect(self.__onJobFinished)
+
+        self.job = job
+        self.jobProgress = 0.0
+        self._solveKey = None
+        job.start()
+
+        for i in self._stateChanged:
+            i()
+        return job
+
+
+    def cancelJob(self) -> None:
+        if self.job is not None:
+            self.job.cancel()
+            # Without its path the solved state has nothing to show.
+            if self._solveKey is not None and self.state == SolverGridWidget.State.solved:
+                self.state = SolverGridWidget.State.viewing
+
+
+    def __onJobProgress(self, fraction: float) -> None:
+        self.jobProgress = fraction
+        for i in self._stateChanged:
+            i()
+
+
+    def __onJobFailed(self, message: str) -> None:
+        if self._solveKey is not None:
+            self.state = SolverGridWidget.State.viewing
+
+        messageBox = QtWidgets.QMessageBox()
+        messageBox.setIcon(QtWidgets.QMessageBox.Warning)
+        messageBox.setText("Фоновая задача завершилась с ошибкой!")
+        messageBox.setInformativeText(message)
+        messageBox.setWindowTitle("Ошибка!")
+        messageBox.exec()
+
+
+    def __onJobFinished(self) -> None:
+        self.job.deleteLater()
+        self.job = None
+        self._solveKey = None
+
+        for i in self._stateChanged:
+            i()
+        # A result requested while the job was busy is scheduled again by the next paint.
+        self.update()
+
+
+    def __requestSolve(self, key: tuple) -> None:
+        if self.job is None:
+            # The search and the rest of the trace run on snapshots, so the walls stay editable meanwhile.
+            grid, algorithm, source, target = self.searchGrid(), self.algorithm, self.source, self.target
+            trace, cache = self.solveTrace, self.pathCache
+
+            def work(report: Callable[[float], None]) -> Optional[List[Tuple[int, int]]]:
+                # The trace runs the same search step by step, so it carries the progress and can be cancelled
+                # at any step; the search of the path itself, about a fifth of the work, is only checked around.
+                # A search logs about five events per reachable cell, which is close enough for a progress bar.
+                estimate = 5 * max(bytes(grid.buffer).count(0), 1)
+                while not trace.finished:
+                    trace.extend(len(trace) + trace.keyframeInterval)
+                    report(0.8 * min(len(trace) / estimate, 1))
+
+                path = cache.solve(algorithm, grid, source, target)
+                report(1)
+                return path
+
+            self.startJob(work, self.__onSolved)
+            self._solveKey = key
+
+        elif self._solveKey != key:
+            # Stale, the request is made again once it has stopped.
+            self.job.cancel()
+
+
+    def __onSolved(self, path: Optional[List[Tuple[int, int]]]) -> None:
+        self._result = (self._solveKey, path, [] if path is None else SolverGridWidget.__pathColors(len(path)))
+        if path is not None:
+            self.traceCursor.seek(len(self.solveTrace))
+        self.update()
+
+
+    def __scheduleResult(self) -> None:
+        # Paints only read the result: starting a job or leaving the solved state runs the state callbacks,
+        # which change other widgets and must not happen while the painter is active.
+        if not self._resultScheduled:
+            self._resultScheduled = True
+            QtCore.QTimer.singleShot(0, self.__updateResult)
+
+
+    def __updateResult(self) -> None:
+        self._resultScheduled = False
+        if self.state != SolverGridWidget.State.solved and not self._editingSolved:
+            return
+
+        key = self.__resultKey()
+        if self._result is None or self._result[0] != key:
+            # Repairs are searched by the paint itself.
+            if not self._replanning:
+                self.__requestSolve(key)
+
+        elif self._result[1] is None and not (self._replanning or self._editingSolved):
+            self.state = SolverGridWidget.State.viewing
+
+            messageBox = QtWidgets.QMessageBox()
+            messageBox.setIcon(QtWidgets.QMessageBox.Warning)
+            messageBox.setText("Невозможно выйти из лабиринта!")
+            messageBox.setInformativeText(f"Пути из точки {self.source} в {self.target} не существует!")
+            messageBox.setWindowTitle("Ошибка!")
+            messageBox.exec()
 
 
     def addStateCallback(self, callback: List[Callable]) -> None:
@@ -166,16 +678,14 @@ class SolverGridWidget(WallGridWidget):
 
 
     @property
-    def interval(self):
-        return self._interval
+    def stepsPerSecond(self) -> Optional[float]:
+        return self._stepsPerSecond
 
 
-    @interval.setter
-    def interval(self, newValue: int):
-        if self.state == SolverGridWidget.State.viewing:
-            self._interval = newValue
-            self.timer.deleteLater()
-            self.timer = QtCore.QTimer(self, timeout = self.__dequeueSolveStep, interval = self._interval)
+    @stepsPerSecond.setter
+    def stepsPerSecond(self, newValue: Optional[float]):
+        self._stepsPerSecond = newValue
+        self._pendingSteps = 0.0
 
 
     @property
@@ -226,11 +736,15 @@ class SolverGridWidget(WallGridWidget):
         for i in self._stateChanged:
             i()
 
+        if self._state == SolverGridWidget.State.solved:
+            self.__scheduleResult()
         self.update()
 
 
     def __startSolving(self):
         self.setAlgorithmSolveQueue()
+        self._replanning = False
+        self._pendingSteps = 0.0
 
         self.timer.start()
         self._state = SolverGridWidget.State.solving
@@ -243,13 +757,25 @@ class SolverGridWidget(WallGridWidget):
 
 
     def __dequeueSolveStep(self) -> None:
-        if self.solveQueue.isEmpty():
-            self.state = SolverGridWidget.State.solved
+        # One timer tick is one frame, only the state after its last step is painted.
+        start = self.traceCursor.position
+        if self._stepsPerSecond is None:
+            deadline = time.perf_counter() + self.frameBudget * self.timer.interval() / 1000
+            target = start
+            while time.perf_counter() < deadline and self.traceCursor.position == target:
+                target += 1024
+                self.traceCursor.seek(target)
         else:
-            used, selected, current = self.solveQueue.dequeue()
-            self.used = {*self.used, *used}
-            self.currentPath = [selected, current]
-            self.update()
+            # Speeds below one step per frame carry the fraction over to the next frames.
+            self._pendingSteps += self._stepsPerSecond / self.frameRate
+            target = start + floor(self._pendingSteps)
+            self._pendingSteps -= floor(self._pendingSteps)
+            self.traceCursor.seek(target)
+
+        if self.traceCursor.position < target:
+            self.state = SolverGridWidget.State.solved
+        elif self.traceCursor.position > start:
+            self.__showSolveStep()
 
 
     def __drawSourceAndTarget(self, painter: QtGui.QPainter) -> None:
@@ -266,152 +792,341 @@ class SolverGridWidget(WallGridWidget):
             left + self.source[1] * self.squareSize, top + self.source[0] * self.squareSize))
 
 
-    def __drawCurrentSolveStep(self, painter: QtGui.QPainter) -> None:
+    def __drawExplored(self, painter: QtGui.QPainter, opacity: float, rows: range, columns: range) -> None:
         left, top = self.getCanvasOrigin()
+        codes = self.traceCursor.codes
 
         rectangle = QtCore.QRectF(0, 0, self.squareSize, self.squareSize)
-        
-        painter.setOpacity(0.5)
+
+        painter.setOpacity(opacity)
         painter.setBrush(SolverGridWidget.colors['used'])
+        for row in rows:
+            start = row * self.grid.columns
+            explored = codes[start + columns.start:start + columns.stop].translate(SolverGridWidget._explored)
+            column = explored.find(1)
+            while column >= 0:
+                painter.drawRect(rectangle.translated(
+                    left + (columns.start + column) * self.squareSize, top + row * self.squareSize))
+                column = explored.find(1, column + 1)
 
-        for x, y in self.used:
-            painter.drawRect(rectangle.translated(
-                left + y * self.squareSize, top + x * self.squareSize))
 
-        painter.setOpacity(1)
-        painter.setBrush(SolverGridWidget.colors['selected'])
+    def __drawPath(self, painter: QtGui.QPainter, path: List[Tuple[int, int]], colors: List[QtGui.QColor],
+                   rows: range, columns: range) -> None:
+        left, top = self.getCanvasOrigin()
 
-        if len(self.currentPath) == 0:
-            pass
-        else:
-            path, current = self.currentPath
-            self.currentPath = []
-            
-            path = PathFindingAlgorithm._reconstructPath(path, self.source, current)
-            color = SolverGridWidget.colors['selected']
-
-            for node in range(len(path)):
-                
-                if (len(path)) != 1:
-                    color = colorsys.hls_to_rgb(2/3 * node / (len(path) - 1), 0.5, 1)
-                    r, g, b = (floor(255 * c) for c in color)
-                    color = QtGui.QColor(r, g, b)
+        rectangle = QtCore.QRectF(0, 0, self.squareSize, self.squareSize)
 
+        painter.setOpacity(1)
+        for (x, y), color in zip(path, colors):
+            if x in rows and y in columns:
                 painter.setBrush(color)
+                painter.drawRect(rectangle.translated(
+                    left + y * self.squareSize, top + x * self.squareSize))
 
 
-                painter.drawRect(rectangle.translated(
-                    left + path[node][1] * self.squareSize, top + path[node][0] * self.squareSize))
+    def __drawCurrentSolveStep(self, painter: QtGui.QPainter, rows: range, columns: range) -> None:
+        self.__drawExplored(painter, 0.5, rows, columns)
 
-    
-    def __drawResult(self, painter: QtGui.QPainter) -> None:
-        left, top = self.getCanvasOrigin()
+        if len(self.currentPath) > 0:
+            self.__drawPath(painter, self.currentPath, SolverGridWidget.__pathColors(len(self.currentPath)), rows, columns)
 
-        rectangle = QtCore.QRectF(0, 0, self.squareSize, self.squareSize)
 
-        result = self.solve()
+    @staticmethod
+    def __pathColors(length: int) -> List[QtGui.QColor]:
+        # A gradient from red at the source to blue at the target.
+        if length == 1:
+            return [SolverGridWidget.colors['selected']]
 
-        if result is not None:
-            while not self.solveQueue.isEmpty():
-                used, _, _ = self.solveQueue.dequeue()
-                self.used = {*self.used, *used}
+        colors = []
+        for node in range(length):
+            color = colorsys.hls_to_rgb(2/3 * node / (length - 1), 0.5, 1)
+            r, g, b = (floor(255 * c) for c in color)
+            colors.append(QtGui.QColor(r, g, b))
+        return colors
 
-            painter.setOpacity(0.33)
-            painter.setBrush(SolverGridWidget.colors['used'])
 
-            for x, y in self.used:
-                painter.drawRect(rectangle.translated(
-                    left + y * self.squareSize, top + x * self.squareSize))
+    def __resultKey(self) -> tuple:
+        return (self.grid, self.grid.version, self.source, self.target, type(self.algorithm), self._replanning)
 
-            painter.setOpacity(1)
-            painter.setBrush(SolverGridWidget.colors['selected'])
-            color = SolverGridWidget.colors['selected']
 
-            for node in range(len(result)):
-                
-                if (len(result)) != 1:
-                    color = colorsys.hls_to_rgb(2/3 * node / (len(result) - 1), 0.5, 1)
-                    r, g, b = (floor(255 * c) for c in color)
-                    color = QtGui.QColor(r, g, b)
+    def __solvedResult(self) -> Optional[Tuple[Optional[List[Tuple[int, int]]], List[QtGui.QColor]]]:
+        # Every resize or hover repaints the widget, the path is only searched again when one of these changes.
+        # A full search runs as a job and gives None until it is done, repairs are quick enough to wait for.
+        key = self.__resultKey()
+        if self._result is None or self._result[0] != key:
+            if not self._replanning:
+                self.__scheduleResult()
+                return None
 
-                painter.setBrush(color)
+            path = self.replan()
+            self._result = (key, path, [] if path is None else SolverGridWidget.__pathColors(len(path)))
 
+        return self._result[1:]
 
-                painter.drawRect(rectangle.translated(
-                    left + result[node][1] * self.squareSize, top + result[node][0] * self.squareSize))
 
-        else: # `result` might be None
-            self.state = SolverGridWidget.State.viewing
+    def __drawResult(self, painter: QtGui.QPainter, rows: range, columns: range) -> None:
+        if self.__solvedResult() is None:
+            # The cells explored so far stay on screen until the search is done.
+            self.__drawExplored(painter, 0.33, rows, columns)
+            return
 
-            messageBox = QtWidgets.QMessageBox()
-            messageBox.setIcon(QtWidgets.QMessageBox.Warning)
-            messageBox.setText("Невозможно выйти из лабиринта!")
-            messageBox.setInformativeText(f"Пути из точки {self.source} в {self.target} не существует!")
-            messageBox.setWindowTitle("Ошибка!")
-            messageBox.exec()
+        result, colors = self.__solvedResult()
+
+        if result is None and (self._replanning or self._editingSolved):
+            # The edit in progress has cut the path off, it may well be restored by the next one.
+            return
+
+        if result is not None:
+            # The explored cells belong to the search before the walls were edited.
+            if not self._replanning:
+                self.__drawExplored(painter, 0.33, rows, columns)
+
+            self.__drawPath(painter, result, colors, rows, columns)
+
+        else: # `result` might be None, the message is shown once the paint is over
+            self.__scheduleResult()
+
+
+    def isRaster(self) -> bool:
+        return self.squareSize < SolverGridWidget.rasterThreshold if self.rasterMode is None else self.rasterMode
+
+
+    def __rasterColorTable(self) -> List[int]:
+        if self._rasterColors is None:
+            background = self.palette().color(QtGui.QPalette.Window)
+            used = SolverGridWidget.colors['used']
+            blend = lambda color, opacity: QtGui.QColor(*(
+                round(a * opacity + b * (1 - opacity)) for a, b in zip(color.getRgb()[:3], background.getRgb()[:3]))).rgb()
+
+            colors = [background.rgb()] * 256
+            colors[SolverGridWidget._raster['wall']] = QtGui.QColor(32, 32, 32).rgb()
+            colors[SolverGridWidget._raster['open']] = blend(used, 0.5)
+            colors[SolverGridWidget._raster['closed']] = blend(used, 0.33)
+            colors[SolverGridWidget._raster['source']] = SolverGridWidget.colors['source'].rgb()
+            colors[SolverGridWidget._raster['target']] = SolverGridWidget.colors['target'].rgb()
+
+            first = SolverGridWidget._raster['path']
+            for i, color in enumerate(SolverGridWidget.__pathColors(256 - first)):
+                colors[first + i] = color.rgb()
+            self._rasterColors = colors
+
+        return self._rasterColors
+
+
+    def __rasterImage(self, rows: range, columns: range, step: int,
+                      path: Optional[List[Tuple[int, int]]], explored: bool) -> QtGui.QImage:
+        # Repaints that change nothing on the grid, like a hover, reuse the last frame.
+        key = (self.grid, self.grid.version, rows, columns, step, self.source, self.target, path,
+               explored and (self.traceCursor, self.traceCursor.position))
+        if self._rasterFrame is not None and self._rasterFrame[0] == key:
+            return self._rasterFrame[2]
+
+        # Builds the pixels of the visible cells a row at a time, a pixel ORs the bits of the `step` x `step`
+        # cells it covers; only the endpoints and the path are set cell by cell.
+        cells = self.grid.buffer
+        codes = self.traceCursor.codes if explored else None
+        width = len(columns)
+        imageWidth = -(-width // step)
+
+        lines = []
+        for first in range(rows.start, rows.stop, step):
+            block = 0
+            for row in range(first, min(first + step, rows.stop)):
+                start = row * self.grid.columns + columns.start
+                block |= int.from_bytes(cells[start:start + width], 'little')
+                if codes is not None:
+                    block |= int.from_bytes(codes[start:start + width].translate(SolverGridWidget._rasterStatus), 'little')
+
+            line = block.to_bytes(imageWidth * step, 'little')
+            if step > 1:
+                merged = 0
+                for phase in range(step):
+                    merged |= int.from_bytes(line[phase::step], 'little')
+                line = merged.to_bytes(imageWidth, 'little')
+            lines.append(line)
+
+        pixels = bytearray(b''.join(lines).translate(SolverGridWidget._rasterMerged))
+
+        def place(cell: Tuple[int, int], value: int) -> None:
+            if cell[0] in rows and cell[1] in columns:
+                pixels[(cell[0] - rows.start) // step * imageWidth + (cell[1] - columns.start) // step] = value
+
+        place(self.source, SolverGridWidget._raster['source'])
+        place(self.target, SolverGridWidget._raster['target'])
+
+        first = SolverGridWidget._raster['path']
+        for node, cell in enumerate(path or []):
+            place(cell, first + (node * (255 - first) // (len(path) - 1) if len(path) > 1 else 0))
+
+        # QImage does not copy the pixels, they have to outlive the paint event.
+        pixels = bytes(pixels)
+        image = QtGui.QImage(pixels, imageWidth, len(lines), imageWidth, QtGui.QImage.Format_Indexed8)
+        image.setColorTable(self.__rasterColorTable())
+        self._rasterFrame = (key, pixels, image)
+        return image
+
+
+    def __patchRasterFrame(self, cell: Optional[Tuple[int, int]]) -> None:
+        # A wall edit on a frame without overlays only changes the pixel of the cell's block,
+        # frames with a path or explored cells are built again.
+        if self._rasterFrame is None or cell is None:
+            return
+
+        key, pixels, image = self._rasterFrame
+        grid, version, rows, columns, step = key[:5]
+        if grid is not self.grid or version != self.grid.version - 1 or key[7] is not None or key[8]:
+            return
+
+        if cell[0] in rows and cell[1] in columns:
+            x, y = (cell[0] - rows.start) // step, (cell[1] - columns.start) // step
+            top, left = rows.start + x * step, columns.start + y * step
+            wall = any(1 in bytes(self.grid.buffer[row * self.grid.columns + left:row * self.grid.columns + min(left + step, columns.stop)])
+                for row in range(top, min(top + step, rows.stop)))
+
+            # The endpoints are drawn over their blocks.
+            if image.pixelIndex(y, x) < SolverGridWidget._raster['source']:
+                image.setPixel(y, x, SolverGridWidget._raster['wall' if wall else 'free'])
+
+        self._rasterFrame = ((grid, self.grid.version) + key[2:], pixels, image)
+
+
+    def __drawRaster(self, painter: QtGui.QPainter, path: Optional[List[Tuple[int, int]]], explored: bool) -> None:
+        # Only the visible cells are drawn, and below a pixel per cell they are merged in blocks of
+        # about a pixel, so the image stays as large as the widget however large the grid is.
+        rows, columns = self.visibleCells()
+        if len(rows) == 0 or len(columns) == 0:
+            return
+
+        step = max(ceil(1 / self.squareSize), 1)
+        image = self.__rasterImage(rows, columns, step, path, explored)
+
+        left, top = self.getCanvasOrigin()
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform, False)
+        painter.drawImage(
+            QtCore.QRectF(left + columns.start * self.squareSize, top + rows.start * self.squareSize,
+                len(columns) * self.squareSize, len(rows) * self.squareSize),
+            image, QtCore.QRectF(0, 0, len(columns) / step, len(rows) / step))
 
 
     def paintEvent(self, event: QtCore.QEvent) -> None:
         painter = QtGui.QPainter(self)
+
+        if self.isRaster():
+            if self.state == SolverGridWidget.State.solving:
+                self.__drawRaster(painter, self.currentPath, True)
+            elif self.state == SolverGridWidget.State.solved or self._editingSolved:
+                result = self.__solvedResult()
+                if result is None:
+                    self.__drawRaster(painter, None, True)
+                elif result[0] is None:
+                    self.__drawRaster(painter, None, False)
+                    self.__drawResult(painter, *self.visibleCells())
+                else:
+                    self.__drawRaster(painter, result[0], not self._replanning)
+            else:
+                self.__drawRaster(painter, None, False)
+
+            painter.end()
+            return
+
+        painter.drawPixmap(0, 0, self._wallLayerPixmap())
         painter.translate(.5, .5)
         painter.setRenderHints(painter.Antialiasing)
 
-        self._drawScene(painter)
-        self._drawWalls(painter)
         self.__drawSourceAndTarget(painter)
 
+        # Only the cells under the repainted area are drawn, the rest of the widget keeps its pixels.
+        rows, columns = self.visibleCells(event.rect())
         if self.state == SolverGridWidget.State.solving:
-            self.__drawCurrentSolveStep(painter)
-        elif self.state == SolverGridWidget.State.solved:
-            self.__drawResult(painter)
+            self.__drawCurrentSolveStep(painter, rows, columns)
+        elif self.state == SolverGridWidget.State.solved or self._editingSolved:
+            self.__drawResult(painter, rows, columns)
         
         painter.end()   
 
 
     def eventFilter(self, source: QtWidgets.QWidget, event: QtCore.QEvent) -> bool:
-        if self.state == SolverGridWidget.State.viewing:
+        if self.state == SolverGridWidget.State.viewing or self.state == SolverGridWidget.State.solved:
             if event.type() == QtCore.QEvent.MouseButtonPress:
+                # Edits in the solved state keep the result on screen, repaired by `replan`.
+                # The middle button only pans the view.
                 if event.button() == QtCore.Qt.LeftButton:
+                    self._editingSolved = self.state == SolverGridWidget.State.solved
+                    self._strokeFrom = self.cellAt(event.pos())
                     self._state = SolverGridWidget.State.drawing
 
                 elif event.button() == QtCore.Qt.RightButton:
+                    self._editingSolved = self.state == SolverGridWidget.State.solved
+                    self._strokeFrom = self.cellAt(event.pos())
                     self._state = SolverGridWidget.State.erasing
 
         elif self.state == SolverGridWidget.State.drawing or self.state == SolverGridWidget.State.erasing:
             if event.type() == QtCore.QEvent.MouseButtonRelease:
-                self._state = SolverGridWidget.State.viewing
+                if self._editingSolved:
+                    self._editingSolved = False
+                    self._state = SolverGridWidget.State.solved
+                else:
+                    self._state = SolverGridWidget.State.viewing
 
         return super().eventFilter(source, event)
 
 
+    @staticmethod
+    def _lineCells(start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        # Bresenham's line moving along one axis at a time: an erased stroke is a passage
+        # the searches can walk, a drawn one leaves no diagonal gaps.
+        (x, y), (x1, y1) = start, end
+        dx, dy = abs(x1 - x), -abs(y1 - y)
+        sx, sy = (1 if x < x1 else -1), (1 if y < y1 else -1)
+        error = dx + dy
+
+        cells = [(x, y)]
+        while (x, y) != (x1, y1):
+            if 2 * error - dy > dx - 2 * error:
+                error += dy
+                x += sx
+            else:
+                error += dx
+                y += sy
+            cells.append((x, y))
+
+        return cells
+
+
+    def _cellsBounds(self, cells: List[Tuple[int, int]]) -> QtCore.QRect:
+        rows = [cell[0] for cell in cells]
+        columns = [cell[1] for cell in cells]
+        return self._cellBounds((min(rows), min(columns))).united(self._cellBounds((max(rows), max(columns))))
+
+
     def mouseMoveEvent(self, event: QtGui.QMouseEvent) -> None:
-        left, top = self.getCanvasOrigin()
-        width, height = self.getCanvasSize()
+        cell = self.cellAt(event.pos())
+
+        if self.drawMode == SolverGridWidget.DrawMode.walls:
+            if self.state == SolverGridWidget.State.drawing or self.state == SolverGridWidget.State.erasing:
+                # Fast drags skip cells between two events, the whole segment is drawn at once.
+                stroke = SolverGridWidget._lineCells(self._strokeFrom, cell)
+                self._strokeFrom = cell
+                changed = self.grid.trySetCells(stroke, self.state == SolverGridWidget.State.drawing)
+
+                if changed and self._editingSolved:
+                    # The explored cells belong to the search before the edit, and the repaired path may go anywhere.
+                    self._replanning = True
+                    self.update()
+                elif changed:
+                    self.update(self._cellsBounds(changed))
+
+        elif self.state == SolverGridWidget.State.drawing and self.grid.inBounds(cell) and not self.grid.getCell(cell):
+            previous = self.target if self.drawMode == SolverGridWidget.DrawMode.target else self.source
+            if self.drawMode == SolverGridWidget.DrawMode.target:
+                self.target = cell
+            else:
+                self.source = cell
 
-        x = event.pos().x()
-        y = event.pos().y()
-
-        i = floor((x - left) / self.squareSize)
-        j = floor((y - top) / self.squareSize)
-
-        if (x >= left) & (x <= left + width) & (y >= top) & (y <= top + height):
-            if self.drawMode == SolverGridWidget.DrawMode.walls:
-                if self.state == SolverGridWidget.State.drawing:
-                    self.grid.trySetCell((j, i))
-                elif self.state == SolverGridWidget.State.erasing:
-                    self.grid.tryResetCell((j, i))  
-
-            elif self.drawMode == SolverGridWidget.DrawMode.target:
-                if self.state == SolverGridWidget.State.drawing:
-                    if not self.grid.getCell((j, i)):
-                        self.target = (j, i)
-
-            elif self.drawMode == SolverGridWidget.DrawMode.source:
-                if self.state == SolverGridWidget.State.drawing:
-                    if not self.grid.getCell((j, i)):
-                        self.source = (j, i)
-                
-            self.update()
-        
-        return super().mouseMoveEvent(event)
+            if self._editingSolved:
+                self.update()
+            else:
+                self.update(self._cellBounds(previous))
+                self.update(self._cellBounds(cell))
 
+        return super().mouseMoveEvent(event)
@@ -1,25 +1,34 @@
-from tkinter import filedialog
 from typing import Dict
-from Algorithms.PathFindingAlgorithm import AStarAlgorithm, BreadthFirstSearchAlgorithm, DijkstraSearchAlgorithm, PathFindingAlgorithm
+from Algorithms.PathFindingAlgorithm import AStarAlgorithm, BidirectionalAStarAlgorithm, BidirectionalBreadthFirstSearchAlgorithm, BreadthFirstSearchAlgorithm, DijkstraSearchAlgorithm, JumpPointSearchAlgorithm, PathFindingAlgorithm
+from Algorithms.HierarchicalPathFinding import HierarchicalPathFindingAlgorithm
 from UserInterface.GridWidget import SolverGridWidget
 from Grid.GridMap import *
 from Grid.MazeGeneratingAlgorithm import *
 from FileSystem.GridFileException import *
 from FileSystem.GridFileLoader import *
 from FileSystem.GridFileSaver import *
+from FileSystem.TiledGridFile import TiledGridLoader
 
 from PyQt5.QtCore import (QMetaObject, QRect, Qt)
 from PyQt5.QtWidgets import *  
 import PyQt5.QtWidgets as QtWidgets
 
-from math import floor
-from typing import Dict
+from math import log
+from typing import Dict, Optional, Tuple
 
 
 class MainWindow(QtWidgets.QMainWindow):
+
+    # The size sliders go through this range on a logarithmic scale.
+    gridSizeRange: Tuple[int, int] = (10, 5000)
+    gridSizeSteps: int = 1000
+
+
     def __init__(self):
         super(MainWindow, self).__init__()  
-        self.algorithms: Dict[str, PathFindingAlgorithm] = {"A*": AStarAlgorithm, "Dijkstra Search": DijkstraSearchAlgorithm, "Breadth-first Search": BreadthFirstSearchAlgorithm}
+        self.algorithms: Dict[str, PathFindingAlgorithm] = {"A*": AStarAlgorithm, "Dijkstra Search": DijkstraSearchAlgorithm, "Breadth-first Search": BreadthFirstSearchAlgorithm,
+            "Bidirectional A*": BidirectionalAStarAlgorithm, "Bidirectional Breadth-first Search": BidirectionalBreadthFirstSearchAlgorithm,
+            "Jump Point Search": JumpPointSearchAlgorithm, "Hierarchical A* (approximate)": HierarchicalPathFindingAlgorithm}
         self.setupUi(self)
 
         self.gridWidget.addStateCallback(self.onStateChanged)
@@ -48,7 +57,13 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
     def onStateChanged(self) -> None:
-        if self.gridWidget.state == SolverGridWidget.State.solving:
+        # While a job runs in the background the start button cancels it.
+        self.progressBar.setVisible(self.gridWidget.job is not None)
+        if self.gridWidget.job is not None:
+            self.progressBar.setValue(round(100 * self.gridWidget.jobProgress))
+            self.startButton.setText("Отмена")
+            self.disableGridEditing()
+        elif self.gridWidget.state == SolverGridWidget.State.solving:
             self.startButton.setText("Пропустить")
             self.disableGridEditing()
         elif self.gridWidget.state == SolverGridWidget.State.solved:
@@ -59,7 +74,9 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
     def processStartButton(self) -> None:
-        if self.gridWidget.state == SolverGridWidget.State.solving:
+        if self.gridWidget.job is not None:
+            self.gridWidget.cancelJob()
+        elif self.gridWidget.state == SolverGridWidget.State.solving:
             self.gridWidget.state = SolverGridWidget.State.solved
         elif self.gridWidget.state == SolverGridWidget.State.solved:
             self.gridWidget.state = SolverGridWidget.State.viewing
@@ -67,16 +84,36 @@ class MainWindow(QtWidgets.QMainWindow):
             self.gridWidget.state = SolverGridWidget.State.solving
 
 
+    @staticmethod
+    def sliderToGridSize(value: int) -> int:
+        low, high = MainWindow.gridSizeRange
+        return round(low * (high / low) ** (value / MainWindow.gridSizeSteps))
+
+
+    @staticmethod
+    def gridSizeToSlider(size: int) -> int:
+        low, high = MainWindow.gridSizeRange
+        return round(MainWindow.gridSizeSteps * log(size / low) / log(high / low))
+
+
     def resizeGrid(self):
-        self.gridWidget.resizeGrid(floor(self.rowSlider.value() / 100 * 90) + 10, 
-            floor(self.columnSlider.value() / 100 * 90) + 10)
+        self.gridWidget.resizeGrid(MainWindow.sliderToGridSize(self.rowSlider.value()), 
+            MainWindow.sliderToGridSize(self.columnSlider.value()))
         
         self.rowLabel.setText("Количество строк: " + str(self.gridWidget.grid.rows))
         self.columnLabel.setText("Количество столбцов: " + str(self.gridWidget.grid.columns))
 
 
     def generateRandomGrid(self):
-        self.gridWidget.grid = DfsMazeGenerator.generate(self.gridWidget.grid.rows, self.gridWidget.grid.columns)
+        if self.gridWidget.job is not None:
+            return
+
+        rows, columns = self.gridWidget.grid.rows, self.gridWidget.grid.columns
+        self.gridWidget.startJob(lambda report: DfsMazeGenerator.generate(rows, columns, progress=report), self.onGridGenerated)
+
+
+    def onGridGenerated(self, grid: GridMatrix):
+        self.gridWidget.grid = grid
 
         if self.gridWidget.grid.getCell(self.gridWidget.target):
             self.gridWidget.grid.tryResetCell(self.gridWidget.target)
@@ -107,14 +144,17 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
     def changeInterval(self):
-        self.gridWidget.interval = floor(self.intervalSlider.value() / 100 * 990) + 10
+        # From one step per second to 10^5 on a logarithmic scale, the rightmost position is the maximal speed.
+        value = self.intervalSlider.value()
+        self.gridWidget.stepsPerSecond = None if value == self.intervalSlider.maximum() else 10 ** (value / 20)
 
     
     def saveFile(self):
-        filename, _ = QFileDialog.getSaveFileName(self, "Текстовые файлы (*.txt)")
+        filename, selectedFilter = QFileDialog.getSaveFileName(self, "Сохранение лабиринта", "",
+            "Текстовые файлы (*.txt);;Двоичные файлы (*.grid)")
 
         if filename:
-            saver = GridFileSaver(self.gridWidget.grid, filename)
+            saver = GridFileSaver(self.gridWidget.grid, filename, True if "*.grid" in selectedFilter else None)
             
             try:
                 saver.save()
@@ -127,23 +167,75 @@ class MainWindow(QtWidgets.QMainWindow):
                 messageBox.exec()
 
 
+    def chooseRegion(self, parent: QWidget, size: Tuple[int, int], tiled: bool) -> Optional[Tuple[int, int, int, int]]:
+        # Mazes larger than the sliders allow are opened in part, the dialog asks which one.
+        low, high = MainWindow.gridSizeRange
+        dialog = QDialog(parent)
+        dialog.setWindowTitle("Загрузка файла")
+        layout = QFormLayout(dialog)
+
+        text = f"Лабиринт {size[0]}x{size[1]} больше допустимого, выберите открываемую часть."
+        if tiled:
+            text += "\nЕё можно сдвигать, перетаскивая вид за край средней кнопкой мыши."
+        layout.addRow(QLabel(text))
+
+        fields = []
+        for label, minimum, maximum, value in (("Первая строка:", 0, size[0] - 1, 0), ("Первый столбец:", 0, size[1] - 1, 0),
+                ("Количество строк:", min(low, size[0]), min(high, size[0]), min(high, size[0])),
+                ("Количество столбцов:", min(low, size[1]), min(high, size[1]), min(high, size[1]))):
+            spinBox = QSpinBox(dialog)
+            spinBox.setRange(minimum, maximum)
+            spinBox.setValue(value)
+            layout.addRow(label, spinBox)
+            fields.append(spinBox)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, dialog)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        layout.addRow(buttons)
+
+        if not dialog.exec_():
+            return None
+
+        # A region reaching past the maze is moved back inside rather than cut.
+        top, left, rows, columns = (field.value() for field in fields)
+        return (min(top, size[0] - rows), min(left, size[1] - columns), rows, columns)
+
+
     def loadFile(self):
         fileDialog = QFileDialog(self)
         fileDialog.setFileMode(QFileDialog.FileMode.ExistingFile)
-        fileDialog.setNameFilter("Текстовые файлы (*.txt)")
+        fileDialog.setNameFilter("Лабиринты (*.txt *.grid *.tiles)")
 
         if fileDialog.exec():
             filename = fileDialog.selectedFiles()[0]
-        
             loader = GridFileLoader(filename)
                 
             try:
-                self.gridWidget.grid = loader.load()
+                # Only the header is read before the region is chosen; tiled files then read just that region,
+                # and the rest of them as the view is panned.
+                size = loader.readSize()
+                region = (0, 0) + size
+                if max(size) > MainWindow.gridSizeRange[1]:
+                    region = self.chooseRegion(fileDialog, size, loader.tiled)
+                    if region is None:
+                        return
+
+                if loader.tiled:
+                    self.gridWidget.openTiles(TiledGridLoader(filename), *region)
+                else:
+                    self.gridWidget.grid = GridFileLoader(filename, region).load()
                 self.gridWidget.resizeGrid(self.gridWidget.grid.rows, self.gridWidget.grid.columns)
                 self.update()
                 
-                self.rowSlider.setValue(floor(10 * self.gridWidget.grid.rows - 100) / 9)
-                self.columnSlider.setValue(floor(10 * self.gridWidget.grid.columns - 100) / 9)
+                # The sliders only follow the loaded grid, which must not be resized to their rounded sizes.
+                for slider, size in ((self.rowSlider, self.gridWidget.grid.rows), (self.columnSlider, self.gridWidget.grid.columns)):
+                    slider.blockSignals(True)
+                    slider.setValue(MainWindow.gridSizeToSlider(size))
+                    slider.blockSignals(False)
+
+                self.rowLabel.setText("Количество строк: " + str(self.gridWidget.grid.rows))
+                self.columnLabel.setText("Количество столбцов: " + str(self.gridWidget.grid.columns))
 
             except GridFileException as e:
                 messageBox = QtWidgets.QMessageBox(fileDialog)
@@ -202,7 +294,8 @@ class MainWindow(QtWidgets.QMainWindow):
         self.rowSlider = QSlider(self.gridSizeLayoutWidget)
         self.rowSlider.setObjectName(u"rowSlider")
         self.rowSlider.setOrientation(Qt.Horizontal)
-        self.rowSlider.setValue(45)
+        self.rowSlider.setMaximum(MainWindow.gridSizeSteps)
+        self.rowSlider.setValue(MainWindow.gridSizeToSlider(50))
         self.gridSizeLayout.addWidget(self.rowSlider)
 
         self.columnLabel = QLabel(self.gridSizeLayoutWidget)
@@ -212,7 +305,8 @@ class MainWindow(QtWidgets.QMainWindow):
         self.columnSlider = QSlider(self.settingsLayoutWidget)
         self.columnSlider.setObjectName(u"columnSlider")
         self.columnSlider.setOrientation(Qt.Horizontal)
-        self.columnSlider.setValue(45)
+        self.columnSlider.setMaximum(MainWindow.gridSizeSteps)
+        self.columnSlider.setValue(MainWindow.gridSizeToSlider(50))
         self.gridSizeLayout.addWidget(self.columnSlider)
         self.gridSizeGroupBox.setMinimumHeight(144)
 
@@ -290,8 +384,8 @@ class MainWindow(QtWidgets.QMainWindow):
         
         self.algorithmLayoutWidget = QWidget(self.algorithmGroupBox)
         self.algorithmLayoutWidget.setObjectName(u"algorithmLayoutWidget")
-        self.algorithmLayoutWidget.setGeometry(QRect(8, 16, 166, 128))
-        self.algorithmLayoutWidget.setFixedHeight(128)
+        self.algorithmLayoutWidget.setGeometry(QRect(8, 16, 166, 160))
+        self.algorithmLayoutWidget.setFixedHeight(160)
 
         self.algorithmLayout = QVBoxLayout(self.algorithmLayoutWidget)
         self.algorithmLayout.setObjectName(u"algorithmLayout")
@@ -313,13 +407,14 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.intervalLabel = QLabel(self.algorithmLayoutWidget)
         self.intervalLabel.setObjectName(u"algorithmLabel")
-        self.intervalLabel.setText("Задержка:")
+        self.intervalLabel.setText("Скорость:")
         self.algorithmLayout.addWidget(self.intervalLabel)
 
         self.intervalSlider = QSlider(self.algorithmLayoutWidget)
         self.intervalSlider.setObjectName(u"intervalSlider")
         self.intervalSlider.setOrientation(Qt.Horizontal)
-        self.intervalSlider.setValue(45)
+        self.intervalSlider.setMaximum(101)
+        self.intervalSlider.setValue(50)
         self.algorithmLayout.addWidget(self.intervalSlider)
         self.intervalSlider.valueChanged.connect(self.changeInterval)
 
@@ -329,6 +424,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.startButton.clicked.connect(self.processStartButton)
         self.algorithmLayout.addWidget(self.startButton)
 
+        self.progressBar = QProgressBar(self.algorithmLayoutWidget)
+        self.progressBar.setObjectName(u"progressBar")
+        self.progressBar.setRange(0, 100)
+        self.progressBar.setVisible(False)
+        self.algorithmLayout.addWidget(self.progressBar)
+
         self.verticalLayout.addWidget(self.algorithmGroupBox)
         self.horizontalLayout.addWidget(self.verticalLayoutWidget)
 
@@ -368,6 +469,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.rowSlider.valueChanged.connect(self.resizeGrid)
         self.columnSlider.valueChanged.connect(self.resizeGrid)
+        self.changeInterval()
 
         self.horizontalLayout.addWidget(self.gridWidget)
 
@@ -0,0 +1,9 @@
+import sys
+
+
+from CommandLine.BatchSolver import BatchSolver
+
+
+if __name__ == '__main__':
+
+    sys.exit(BatchSolver.main())
@@ -0,0 +1,9 @@
+import sys
+
+
+from CommandLine.Benchmark import Benchmark
+
+
+if __name__ == '__main__':
+
+    sys.exit(Benchmark.main())
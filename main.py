@@ -1,16 +1,21 @@
-import PyQt5.QtWidgets as QtWidgets
-import PyQt5.QtGui as QtGui
 import sys
 
 
-from UserInterface.MainWindow import MainWindow
+def main() -> int:
+    # The GUI toolkit is imported only here, so the core packages (`Grid`, `Algorithms`,
+    # `FileSystem`) stay importable on headless workers without PyQt5.
+    import PyQt5.QtWidgets as QtWidgets
 
-
-if __name__ == '__main__':
+    from UserInterface.MainWindow import MainWindow
 
     app = QtWidgets.QApplication(sys.argv) 
 
     w = MainWindow()
     w.show()
 
-    sys.exit(app.exec_())
\ No newline at end of file
+    return app.exec_()
+
+
+if __name__ == '__main__':
+
+    sys.exit(main())